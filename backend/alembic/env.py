@@ -1,5 +1,4 @@
 from logging.config import fileConfig
-import os
 import sys
 from pathlib import Path
 
@@ -10,14 +9,10 @@ sys.path.append(root_path)
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from alembic import context
-from dotenv import load_dotenv
 
 # Importar Base desde models
 from app.models import Base
-
-# Obtener la ruta del directorio raíz (backend)
-env_path = os.path.join(root_path, '.env')
-load_dotenv(dotenv_path=env_path)
+from app.database import get_shard_urls
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -32,42 +27,50 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
-# URL de la base de datos desde variables de entorno
-def get_url():
-    return f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+# URLs de los shards desde la configuración de la aplicación (.env)
+def get_urls():
+    return get_shard_urls()
+
+# SQLite no soporta la mayoría de ALTER TABLE: Alembic recrea la tabla en su lugar
+def is_sqlite(url):
+    return url.startswith("sqlite")
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
-    url = get_url()
+    # Todos los shards comparten el esquema: se genera el SQL del primero
+    url = get_urls()[0]
     context.configure(
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=is_sqlite(url),
     )
 
     with context.begin_transaction():
         context.run_migrations()
 
 def run_migrations_online() -> None:
-    """Run migrations in 'online' mode."""
-    configuration = config.get_section(config.config_ini_section)
-    configuration["sqlalchemy.url"] = get_url()
-    
-    connectable = engine_from_config(
-        configuration,
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
-
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection, 
-            target_metadata=target_metadata
+    """Run migrations in 'online' mode, on every shard."""
+    for url in get_urls():
+        configuration = config.get_section(config.config_ini_section)
+        configuration["sqlalchemy.url"] = url
+        
+        connectable = engine_from_config(
+            configuration,
+            prefix="sqlalchemy.",
+            poolclass=pool.NullPool,
         )
 
-        with context.begin_transaction():
-            context.run_migrations()
+        with connectable.connect() as connection:
+            context.configure(
+                connection=connection, 
+                target_metadata=target_metadata,
+                render_as_batch=is_sqlite(url),
+            )
+
+            with context.begin_transaction():
+                context.run_migrations()
 
 if context.is_offline_mode():
     run_migrations_offline()
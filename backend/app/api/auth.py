@@ -7,6 +7,7 @@ from ..schemas.user import UserCreate, UserLogin, Token, User as UserSchema
 from ..models.user import User
 from ..services.user_service import create_user, authenticate_user
 from ..database import get_db
+from .deps import get_user_db
 
 router = APIRouter(
     prefix="/auth",
@@ -45,7 +46,7 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)) -> Any:
             description="Obtiene la información del usuario autenticado usando el token JWT.")
 def read_users_me(
     current_user_email: str = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_db)
 ) -> Any:
     """
     Obtiene la información del usuario autenticado.
@@ -0,0 +1,36 @@
+from fastapi import Depends, HTTPException, status
+
+from ..core.security import get_current_user
+from ..database import CATALOG_SHARD, get_session, get_shard_ids
+from ..services.shard_service import get_directory_entry
+
+def get_user_shard(current_user_email: str = Depends(get_current_user)) -> int:
+    """Obtiene el shard del usuario autenticado a partir del directorio."""
+    # Con un único shard no hace falta consultar el directorio
+    if len(get_shard_ids()) == 1:
+        return CATALOG_SHARD
+
+    catalog = get_session(CATALOG_SHARD)
+    try:
+        entry = get_directory_entry(catalog, current_user_email)
+    finally:
+        catalog.close()
+
+    # Usuarios anteriores al sharding que aún no figuran en el directorio
+    if entry is None:
+        return CATALOG_SHARD
+    if entry.moving:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Los datos del usuario se están migrando, reintente en unos segundos",
+            headers={"Retry-After": "2"},
+        )
+    return entry.shard_id
+
+# Dependency: sesión sobre el shard del usuario autenticado
+def get_user_db(shard_id: int = Depends(get_user_shard)):
+    db = get_session(shard_id)
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from ..core.security import get_current_user
-from ..schemas.task import Task, TaskCreate, TaskUpdate, Subtask, SubtaskCreate
+from ..schemas.task import Task, TaskCreate, TaskUpdate, Subtask, SubtaskCreate, ArchivedTask
 from ..services.task_service import (
     create_task, get_user_tasks, get_task, update_task, delete_task,
-    create_subtask, update_subtask, delete_subtask, get_user_tasks_by_status
+    create_subtask, update_subtask, delete_subtask, get_user_tasks_by_status,
+    move_subtask, needs_rebalance, rebalance_subtasks_in_background
 )
-from ..database import get_db
+from ..services.archive_service import get_user_archived_tasks
+from .deps import get_user_db, get_user_shard
 from ..models.user import User
 
 router = APIRouter(
@@ -23,7 +25,7 @@ router = APIRouter(
 def create_task_endpoint(
     task: TaskCreate,
     current_user_email: str = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_db)
 ):
     """
     Crea una nueva tarea con:
@@ -43,7 +45,7 @@ def read_tasks(
     skip: int = 0,
     limit: int = 100,
     current_user_email: str = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_db)
 ):
     """
     Obtiene la lista de tareas del usuario con paginación:
@@ -53,13 +55,31 @@ def read_tasks(
     user = db.query(User).filter(User.email == current_user_email).first()
     return get_user_tasks(db, user.id, skip, limit)
 
+# Debe declararse antes de "/{task_id}" para que "archive" no se interprete como ID
+@router.get("/archive", response_model=List[ArchivedTask],
+           summary="Listar tareas archivadas",
+           description="Obtiene las tareas completadas que fueron movidas al archivo.")
+def read_archived_tasks(
+    skip: int = 0,
+    limit: int = 100,
+    current_user_email: str = Depends(get_current_user),
+    db: Session = Depends(get_user_db)
+):
+    """
+    Obtiene la lista de tareas archivadas del usuario con paginación:
+    - **skip**: Número de tareas a saltar
+    - **limit**: Número máximo de tareas a devolver
+    """
+    user = db.query(User).filter(User.email == current_user_email).first()
+    return get_user_archived_tasks(db, user.id, skip, limit)
+
 @router.get("/{task_id}", response_model=Task,
            summary="Obtener tarea",
            description="Obtiene una tarea específica del usuario autenticado.")
 def read_task(
     task_id: int,
     current_user_email: str = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_db)
 ):
     """
     Obtiene una tarea específica por su ID:
@@ -75,7 +95,7 @@ def update_task_endpoint(
     task_id: int,
     task_update: TaskUpdate,
     current_user_email: str = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_db)
 ):
     """
     Actualiza una tarea existente:
@@ -94,7 +114,7 @@ def update_task_endpoint(
 def delete_task_endpoint(
     task_id: int,
     current_user_email: str = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_db)
 ):
     """
     Elimina una tarea por su ID:
@@ -110,17 +130,49 @@ def delete_task_endpoint(
 def create_subtask_endpoint(
     task_id: int,
     subtask: SubtaskCreate,
+    background_tasks: BackgroundTasks,
     current_user_email: str = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    shard_id: int = Depends(get_user_shard),
+    db: Session = Depends(get_user_db)
 ):
     """
-    Crea una nueva subtarea:
+    Crea una nueva subtarea al final de la lista:
     - **task_id**: ID de la tarea padre
     - **title**: Título de la subtarea
     - **completed**: Estado de completado (por defecto False)
     """
     user = db.query(User).filter(User.email == current_user_email).first()
-    return create_subtask(db, task_id, user.id, subtask)
+    db_subtask = create_subtask(db, task_id, user.id, subtask)
+    if needs_rebalance(db_subtask.position):
+        background_tasks.add_task(rebalance_subtasks_in_background, shard_id, task_id)
+    return db_subtask
+
+@router.put("/{task_id}/subtasks/{subtask_id}/move", response_model=Subtask,
+           summary="Mover subtarea",
+           description="Cambia la posición de una subtarea dentro de su tarea.")
+def move_subtask_endpoint(
+    task_id: int,
+    subtask_id: int,
+    background_tasks: BackgroundTasks,
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+    current_user_email: str = Depends(get_current_user),
+    shard_id: int = Depends(get_user_shard),
+    db: Session = Depends(get_user_db)
+):
+    """
+    Mueve una subtarea; solo se actualiza la posición de esa subtarea:
+    - **task_id**: ID de la tarea padre
+    - **subtask_id**: ID de la subtarea a mover
+    - **after**: ID de la subtarea que quedará justo antes (opcional)
+    - **before**: ID de la subtarea que quedará justo después (opcional)
+    """
+    user = db.query(User).filter(User.email == current_user_email).first()
+    subtask = move_subtask(db, subtask_id, task_id, user.id, after, before)
+    # Las posiciones se alargan con los movimientos: se acortan tras responder
+    if needs_rebalance(subtask.position):
+        background_tasks.add_task(rebalance_subtasks_in_background, shard_id, task_id)
+    return subtask
 
 @router.put("/{task_id}/subtasks/{subtask_id}", response_model=Subtask,
            summary="Actualizar subtarea",
@@ -130,7 +182,7 @@ def update_subtask_endpoint(
     subtask_id: int,
     completed: bool,
     current_user_email: str = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_db)
 ):
     """
     Actualiza el estado de una subtarea:
@@ -148,7 +200,7 @@ def delete_subtask_endpoint(
     task_id: int,
     subtask_id: int,
     current_user_email: str = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_db)
 ):
     """
     Elimina una subtarea:
@@ -166,7 +218,7 @@ def read_tasks_by_status(
     skip: int = 0,
     limit: int = 100,
     current_user_email: str = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_db)
 ):
     """
     Obtiene la lista de tareas del usuario filtradas por estado:
@@ -0,0 +1,173 @@
+"""
+Línea de comandos del backend.
+
+    python main.py serve [--workers N]     Arranca la API en producción
+    python main.py check-startup           Verifica el presupuesto de arranque
+    python main.py shards backfill         Registra usuarios previos en el directorio
+    python main.py shards move ID SHARD    Mueve un usuario a otro shard
+"""
+import argparse
+import subprocess
+import sys
+from typing import List, Tuple
+
+from .core.config import BASE_DIR, get_settings
+from .database import dispose_engine
+
+def _post_fork(server, worker) -> None:
+    # Por si algo creó el engine en el master: cada worker necesita su propio pool
+    dispose_engine(close=False)
+
+def _serve_gunicorn(host: str, port: int, workers: int, graceful_timeout: int, max_requests: int) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        """Gunicorn con workers de uvicorn y la app precargada en el master."""
+
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # Igual que `uvicorn main:app`: la app se construye una sola vez
+            from main import app
+            return app
+
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        # La app se importa una sola vez antes del fork; los workers
+        # comparten esas páginas de memoria y arrancan más rápido
+        "preload_app": True,
+        "post_fork": _post_fork,
+        # SIGHUP reinicia los workers de forma ordenada
+        "graceful_timeout": graceful_timeout,
+        "max_requests": max_requests,
+        "max_requests_jitter": max_requests // 10 if max_requests else 0,
+    }
+    Server(options).run()
+
+def serve(args: argparse.Namespace) -> None:
+    settings = get_settings()
+    host = args.host or settings.API_HOST
+    port = args.port or settings.API_PORT
+    workers = args.workers or settings.API_WORKERS
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        # Windows o sin gunicorn: uvicorn gestiona los procesos (sin precarga)
+        import uvicorn
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            workers=workers,
+            timeout_graceful_shutdown=settings.API_GRACEFUL_TIMEOUT,
+            limit_max_requests=settings.API_MAX_REQUESTS or None,
+        )
+        return
+
+    _serve_gunicorn(host, port, workers, settings.API_GRACEFUL_TIMEOUT, settings.API_MAX_REQUESTS)
+
+def _parse_importtime(output: str, module: str = "main") -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Procesa la salida de `python -X importtime` para un módulo.
+
+    Solo cuenta el subárbol de `module`: los imports del propio intérprete
+    (`site`, `encodings`...) no dependen de la app.
+
+    Returns:
+        Tiempo acumulado de `module` en microsegundos y sus imports directos con su coste
+    """
+    children = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Cada nivel de anidamiento añade dos espacios; los hijos se listan
+        # antes que su padre
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        cumulative_us = int(cumulative.strip())
+        if depth == 1:
+            children.append((cumulative_us, name.strip()))
+        elif depth == 0:
+            if name.strip() == module:
+                children.sort(reverse=True)
+                return cumulative_us, children
+            children = []
+    raise ValueError(f"No se encontró el import de {module!r} en la salida")
+
+def check_startup(args: argparse.Namespace) -> None:
+    budget_ms = args.budget_ms or get_settings().STARTUP_BUDGET_MS
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        sys.exit(result.returncode)
+
+    total_us, top_level = _parse_importtime(result.stderr)
+    total_ms = total_us / 1000
+
+    print(f"Tiempo de importación: {total_ms:.1f} ms (presupuesto: {budget_ms} ms)")
+    for cumulative_us, name in top_level[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    if total_ms > budget_ms:
+        print("Presupuesto de arranque superado", file=sys.stderr)
+        sys.exit(1)
+
+def shards_backfill(args: argparse.Namespace) -> None:
+    from .services.shard_service import backfill_directory
+    added = backfill_directory(args.shard)
+    print(f"Usuarios añadidos al directorio: {added}")
+
+def shards_move(args: argparse.Namespace) -> None:
+    from .services.shard_service import move_user
+    try:
+        move_user(args.user_id, args.target_shard, grace_seconds=args.grace_seconds)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        sys.exit(1)
+    print(f"Usuario {args.user_id} movido al shard {args.target_shard}")
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="To-Do List API")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Arranca la API con N workers")
+    serve_parser.add_argument("--host", help="Por defecto API_HOST")
+    serve_parser.add_argument("--port", type=int, help="Por defecto API_PORT")
+    serve_parser.add_argument("--workers", type=int, help="Por defecto API_WORKERS")
+    serve_parser.set_defaults(func=serve)
+
+    startup_parser = subparsers.add_parser("check-startup", help="Mide el tiempo de importación de la app")
+    startup_parser.add_argument("--budget-ms", type=int, help="Por defecto STARTUP_BUDGET_MS")
+    startup_parser.add_argument("--top", type=int, default=10, help="Imports más costosos a mostrar")
+    startup_parser.set_defaults(func=check_startup)
+
+    shards_parser = subparsers.add_parser("shards", help="Administración de shards")
+    shards_subparsers = shards_parser.add_subparsers(dest="shards_command", required=True)
+
+    backfill_parser = shards_subparsers.add_parser("backfill", help="Registra en el directorio los usuarios de un shard")
+    backfill_parser.add_argument("--shard", type=int, default=0, help="Shard a recorrer (por defecto el catálogo)")
+    backfill_parser.set_defaults(func=shards_backfill)
+
+    move_parser = shards_subparsers.add_parser("move", help="Mueve un usuario y sus tareas a otro shard")
+    move_parser.add_argument("user_id", type=int)
+    move_parser.add_argument("target_shard", type=int)
+    move_parser.add_argument("--grace-seconds", type=float, default=2.0,
+                             help="Espera para que terminen las peticiones en curso")
+    move_parser.set_defaults(func=shards_move)
+
+    args = parser.parse_args(argv)
+    args.func(args)
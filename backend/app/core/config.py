@@ -1,13 +1,36 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from pathlib import Path
+from typing import Literal, Optional
+
+# Directorio backend/, donde vive el archivo .env
+BASE_DIR = Path(__file__).resolve().parents[2]
 
 class Settings(BaseSettings):
     # Database settings
-    DB_HOST: str
-    DB_PORT: str
-    DB_NAME: str
-    DB_USER: str
-    DB_PASSWORD: str
+    # "postgresql" (servidor) o "sqlite" (archivo local, sin dependencias)
+    DB_BACKEND: Literal["postgresql", "sqlite"] = "postgresql"
+    DB_HOST: str = "localhost"
+    DB_PORT: str = "5432"
+    DB_NAME: str = "todo_db"
+    DB_USER: str = "postgres"
+    DB_PASSWORD: str = ""
+
+    # SQLite settings (solo con DB_BACKEND=sqlite)
+    # Ruta relativa al directorio backend/, o ":memory:"
+    SQLITE_PATH: str = "todo.db"
+    SQLITE_READ_POOL_SIZE: int = 5
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 20000
+    SQLITE_MMAP_SIZE: int = 268435456
+
+    # Sharding settings
+    # URLs separadas por comas; la primera es el shard catálogo (directorio de
+    # usuarios). Vacío: un único shard con la base de datos DB_*.
+    SHARD_URLS: str = ""
+    # Nodo (0-255) para los ids globales. Vacío reserva uno libre por proceso
+    # en el catálogo; fijarlo solo si cada valor lo usa un único proceso
+    ID_NODE: Optional[int] = None
 
     # JWT settings
     JWT_SECRET_KEY: str
@@ -17,9 +40,33 @@ class Settings(BaseSettings):
     # Server settings
     API_PORT: int = 8000
     API_HOST: str = "0.0.0.0"
+    API_WORKERS: int = 1
+    API_GRACEFUL_TIMEOUT: int = 30
+    API_MAX_REQUESTS: int = 0  # 0 desactiva el reciclado de workers
+    # Tiempo de importación de `main` medido con `check-startup` (20 ejecuciones,
+    # Python 3.11, 1 CPU): mediana 1176 ms, máximo 1504 ms. El presupuesto deja
+    # ~33 % de margen sobre el máximo
+    STARTUP_BUDGET_MS: int = 2000
+
+    # Archive settings
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_AFTER_DAYS: int = 90
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_INTERVAL_SECONDS: int = 3600
+
+    # Subtask settings
+    # Longitud de posición a partir de la cual se rebalancean las subtareas
+    SUBTASK_POSITION_MAX_LENGTH: int = 12
+
+    # Reminder settings
+    REMINDERS_ENABLED: bool = True
+    REMINDER_LEAD_MINUTES: int = 60
+    REMINDER_HORIZON_MINUTES: int = 1440
+    REMINDER_POLL_SECONDS: int = 30
+    REMINDER_SINK: str = "app.services.reminder_service:LogReminderSink"
 
     class Config:
-        env_file = ".env"
+        env_file = BASE_DIR / ".env"
 
 @lru_cache()
 def get_settings():
@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from typing import Optional
+
+from .config import get_settings
+
+# Identificadores globales (únicos entre shards), estilo Snowflake.
+# Caben en 53 bits para que el frontend pueda representarlos como `number`:
+#   41 bits de milisegundos desde EPOCH_MS | 8 bits de nodo | 4 bits de secuencia
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+NODE_BITS = 8
+SEQUENCE_BITS = 4
+MAX_NODE = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+class IdGenerator:
+    """Genera ids crecientes en el tiempo y únicos por nodo."""
+
+    def __init__(self, node_id: int):
+        if not 0 <= node_id <= MAX_NODE:
+            raise ValueError(f"node_id debe estar entre 0 y {MAX_NODE}")
+        self.node_id = node_id
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self) -> int:
+        with self._lock:
+            now_ms = int(time.time() * 1000) - EPOCH_MS
+            # Si el reloj retrocede se sigue usando el último milisegundo
+            now_ms = max(now_ms, self._last_ms)
+            if now_ms == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # Secuencia agotada en este milisegundo: esperar al siguiente
+                    while now_ms <= self._last_ms:
+                        now_ms = int(time.time() * 1000) - EPOCH_MS
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+            return (now_ms << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self._sequence
+
+# Espacio de advisory locks de Postgres para los nodos (clave de dos enteros)
+NODE_LOCK_NAMESPACE = 0x49444E44  # "IDND"
+
+_generator: Optional[IdGenerator] = None
+_generator_pid: Optional[int] = None
+# Recursos que mantienen el nodo reservado mientras viva el proceso. Tras un
+# fork se conservan los del padre sin cerrarlos: cerrarlos desde el hijo
+# liberaría también el nodo del padre.
+_leases: list = []
+
+def _lock_file_byte(fd: int, offset: int) -> bool:
+    """Bloquea un byte del archivo sin esperar; el lock se libera al morir el proceso."""
+    try:
+        if os.name == "nt":
+            import msvcrt
+            os.lseek(fd, offset, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+        return True
+    except OSError:
+        return False
+
+def _lease_sqlite_node(database: str) -> int:
+    # Todos los procesos que comparten la base de datos están en la misma
+    # máquina: cada nodo es un byte de un archivo de locks junto a ella
+    fd = os.open(f"{database}-ids.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    for node_id in range(MAX_NODE + 1):
+        if _lock_file_byte(fd, node_id):
+            _leases.append(fd)
+            return node_id
+    os.close(fd)
+    raise RuntimeError("No quedan nodos libres para generar ids")
+
+def _lease_postgres_node(url) -> int:
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import NullPool
+
+    # Conexión propia fuera del pool: el advisory lock dura lo que la sesión
+    conn = create_engine(url, poolclass=NullPool).connect().execution_options(isolation_level="AUTOCOMMIT")
+    for node_id in range(MAX_NODE + 1):
+        acquired = conn.execute(
+            text("SELECT pg_try_advisory_lock(:namespace, :node)"),
+            {"namespace": NODE_LOCK_NAMESPACE, "node": node_id},
+        ).scalar()
+        if acquired:
+            _leases.append(conn)
+            return node_id
+    conn.close()
+    raise RuntimeError("No quedan nodos libres para generar ids")
+
+def _lease_node_id() -> int:
+    """
+    Reserva un nodo libre para este proceso en el shard catálogo.
+
+    En Postgres con un advisory lock y en SQLite con un lock de archivo; en
+    ambos casos el nodo queda libre automáticamente cuando el proceso termina.
+    """
+    from sqlalchemy.engine import make_url
+    from ..database import CATALOG_SHARD, get_shard_urls
+
+    url = make_url(get_shard_urls()[CATALOG_SHARD])
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            # Base de datos en memoria: nadie más genera ids sobre ella
+            return 0
+        return _lease_sqlite_node(url.database)
+    return _lease_postgres_node(url)
+
+def init_id_generator() -> None:
+    """
+    Prepara el generador de ids del proceso actual.
+
+    Con `ID_NODE` se usa ese nodo; si no, se reserva uno libre en el catálogo.
+    Se llama al arrancar cada worker para fallar pronto si no quedan nodos;
+    `generate_id` lo hace por su cuenta si todavía no se llamó.
+    """
+    global _generator, _generator_pid
+    if _generator is not None and _generator_pid == os.getpid():
+        return
+    node_id = get_settings().ID_NODE
+    if node_id is None:
+        node_id = _lease_node_id()
+    _generator = IdGenerator(node_id)
+    _generator_pid = os.getpid()
+
+def generate_id() -> int:
+    """Genera un nuevo id global. Se usa como `default` de las claves primarias."""
+    # Tras un fork el generador se vuelve a crear con un nodo propio del nuevo proceso
+    init_id_generator()
+    return _generator.next_id()
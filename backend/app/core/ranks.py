@@ -0,0 +1,67 @@
+from typing import List, Optional
+
+# Posiciones fraccionarias como cadenas en base 36 que se ordenan
+# lexicográficamente ("a" < "a5" < "b"). Siempre existe una cadena entre dos
+# dadas, así que mover un elemento solo reescribe su propia posición.
+# Las claves nunca terminan en "0" para que siempre quepa otra por delante.
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+def _midpoint(a: str, b: Optional[str]) -> str:
+    """Cadena entre `a` y `b` (a < b; "" es el mínimo y None el máximo)."""
+    if b is not None:
+        # Saltar el prefijo común (a se completa con ceros)
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b) // 2]
+    # Dígitos consecutivos
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+def _key_after(a: str) -> str:
+    """Clave corta posterior a `a`: incrementa el primer dígito que no sea el máximo."""
+    for i, char in enumerate(a):
+        if char != DIGITS[-1]:
+            return a[:i] + DIGITS[DIGITS.index(char) + 1]
+    return a + _midpoint("", None)
+
+def key_between(a: Optional[str], b: Optional[str]) -> str:
+    """
+    Genera una posición entre `a` y `b`.
+
+    Args:
+        a: Posición anterior (None para insertar al principio)
+        b: Posición siguiente (None para insertar al final)
+
+    Raises:
+        ValueError: Si `a` no es menor que `b`
+    """
+    if a is not None and b is not None and a >= b:
+        raise ValueError(f"La posición {a!r} debe ser menor que {b!r}")
+    if b is None:
+        return _key_after(a) if a else _midpoint("", None)
+    return _midpoint(a or "", b)
+
+def _encode(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, remainder = divmod(value, BASE)
+        digits.append(DIGITS[remainder])
+    return "".join(reversed(digits)).rstrip("0")
+
+def even_keys(count: int) -> List[str]:
+    """Genera `count` posiciones cortas y equiespaciadas (para rebalancear)."""
+    width = 1
+    # Dejar al menos ~BASE huecos entre posiciones consecutivas
+    while BASE ** width < (count + 1) * BASE:
+        width += 1
+    step = BASE ** width // (count + 1)
+    return [_encode(step * (i + 1), width) for i in range(count)]
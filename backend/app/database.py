@@ -1,36 +1,201 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import Select
+from typing import Dict, List
 
-# Cargar variables de entorno
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-env_path = os.path.join(BASE_DIR, '.env')
-load_dotenv(dotenv_path=env_path)
+from .core.config import BASE_DIR, get_settings
 
-# Configuración de la base de datos con valores por defecto
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "5432")
-DB_NAME = os.getenv("DB_NAME", "todo_db")
-DB_USER = os.getenv("DB_USER", "postgres")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "43131797")
+Base = declarative_base()
 
-print(DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD)
+# Shard que guarda el directorio de usuarios (email -> shard)
+CATALOG_SHARD = 0
 
-SQLALCHEMY_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Los engines se crean de forma perezosa: importar este módulo no abre
+# conexiones y, en modo multi-proceso, cada worker crea sus propios pools
+# después del fork.
+_engines: Dict[int, Engine] = {}
+# Pools de solo lectura (SQLite); en Postgres se usa el mismo engine
+_read_engines: Dict[int, Engine] = {}
 
-print(SQLALCHEMY_DATABASE_URL)
+class RoutingSession(Session):
+    """
+    Sesión que envía las lecturas al pool de lectura cuando existe.
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    En cuanto la transacción escribe, todo lo demás (lecturas incluidas) va al
+    escritor para que la sesión vea sus propios cambios.
+    """
 
-Base = declarative_base()
+    def get_bind(self, mapper=None, clause=None, **kw):
+        read_bind = self.info.get("read_bind")
+        if (
+            read_bind is not None
+            and not self._flushing
+            and not self.info.get("wrote")
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+        ):
+            return read_bind
+        # Un SELECT ... FOR UPDATE también fija la transacción en el escritor:
+        # lo que se lea después debe ver el estado que protege el bloqueo
+        if clause is not None and (not isinstance(clause, Select) or clause._for_update_arg is not None):
+            self.info["wrote"] = True
+        return super().get_bind(mapper, clause=clause, **kw)
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_flush_as_write(session, flush_context):
+    # El flush del ORM pide el bind sin cláusula (get_bind(mapper)), así que
+    # get_bind no lo ve como escritura
+    session.info["wrote"] = True
+
+@event.listens_for(RoutingSession, "after_commit")
+@event.listens_for(RoutingSession, "after_rollback")
+def _reset_routing(session):
+    session.info.pop("wrote", None)
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+
+def get_database_url() -> str:
+    """Construye la URL de conexión a partir de la configuración."""
+    settings = get_settings()
+    if settings.DB_BACKEND == "sqlite":
+        if settings.SQLITE_PATH == ":memory:":
+            return "sqlite://"
+        return f"sqlite:///{(BASE_DIR / settings.SQLITE_PATH).resolve()}"
+    return (
+        f"postgresql://{settings.DB_USER}:{settings.DB_PASSWORD}"
+        f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
+    )
+
+def get_shard_urls() -> List[str]:
+    """URLs de todos los shards, indexadas por id de shard."""
+    settings = get_settings()
+    urls = [url.strip() for url in settings.SHARD_URLS.split(",") if url.strip()]
+    return urls or [get_database_url()]
+
+def get_shard_ids() -> List[int]:
+    return list(range(len(get_shard_urls())))
+
+def _is_sqlite_memory(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:")
+
+def _configure_sqlite(engine: Engine, begin: str, read_only: bool = False) -> None:
+    """
+    Ajusta las conexiones SQLite: WAL, pragmas y control explícito de transacciones.
+
+    `begin` es la sentencia de inicio de transacción: el escritor usa
+    BEGIN IMMEDIATE para tomar el lock de escritura al empezar y no fallar
+    con SQLITE_BUSY al pasar de lectura a escritura.
+    """
+    settings = get_settings()
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        # pysqlite no debe emitir sus propios BEGIN
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def on_begin(conn):
+        conn.exec_driver_sql(begin)
+
+def _create_engine(url: str) -> Engine:
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_pre_ping=True)
+
+    if _is_sqlite_memory(url):
+        # Una única conexión (la base de datos vive en ella): los hilos se
+        # turnan para usarla a través del pool
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=QueuePool,
+            pool_size=1,
+            max_overflow=0,
+        )
+        _configure_sqlite(engine, begin="BEGIN")
+        return engine
+
+    # Un único escritor por proceso; las escrituras concurrentes esperan turno
+    # en el pool en lugar de competir por el lock del archivo
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=get_settings().SQLITE_BUSY_TIMEOUT_MS / 1000,
+    )
+    _configure_sqlite(engine, begin="BEGIN IMMEDIATE")
+    return engine
+
+def _create_read_engine(url: str) -> Engine:
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=get_settings().SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+    )
+    _configure_sqlite(engine, begin="BEGIN", read_only=True)
+    return engine
+
+def get_engine(shard_id: int = CATALOG_SHARD) -> Engine:
+    """
+    Obtiene el engine de un shard en el proceso actual, creándolo en el primer uso.
+
+    En SQLite es el engine del escritor único.
+    """
+    engine = _engines.get(shard_id)
+    if engine is None:
+        engine = _engines[shard_id] = _create_engine(get_shard_urls()[shard_id])
+    return engine
+
+def get_read_engine(shard_id: int = CATALOG_SHARD) -> Engine:
+    """Obtiene el engine de lectura de un shard (el mismo que el de escritura fuera de SQLite)."""
+    engine = _read_engines.get(shard_id)
+    if engine is None:
+        url = get_shard_urls()[shard_id]
+        if url.startswith("sqlite") and not _is_sqlite_memory(url):
+            engine = _create_read_engine(url)
+        else:
+            engine = get_engine(shard_id)
+        _read_engines[shard_id] = engine
+    return engine
+
+def dispose_engine(close: bool = True) -> None:
+    """
+    Descarta los engines del proceso actual.
+
+    Tras un fork se debe llamar con `close=False` para no cerrar las
+    conexiones que todavía usa el proceso padre.
+    """
+    for engine in {*_engines.values(), *_read_engines.values()}:
+        engine.dispose(close=close)
+    _engines.clear()
+    _read_engines.clear()
+
+def get_session(shard_id: int = CATALOG_SHARD) -> Session:
+    """Crea una nueva sesión ligada al engine de un shard."""
+    engine = get_engine(shard_id)
+    read_engine = get_read_engine(shard_id)
+    info = {"read_bind": read_engine} if read_engine is not engine else {}
+    return SessionLocal(bind=engine, info=info)
 
-# Dependency
+# Dependency: sesión sobre el shard catálogo
 def get_db():
-    db = SessionLocal()
+    db = get_session()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
@@ -0,0 +1,3 @@
+"""
+Trabajos en segundo plano de la aplicación
+"""
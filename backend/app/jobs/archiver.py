@@ -0,0 +1,59 @@
+import logging
+import threading
+from typing import Optional
+
+from ..database import CATALOG_SHARD, get_session, get_shard_ids
+from ..services.archive_service import archive_completed_tasks
+
+logger = logging.getLogger(__name__)
+
+class ArchiveJob:
+    """Ejecuta periódicamente el archivado de tareas completadas en un hilo aparte."""
+
+    def __init__(self, older_than_days: int, batch_size: int, interval_seconds: int):
+        self.older_than_days = older_than_days
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        """Ejecuta una pasada completa de archivado en todos los shards."""
+        archived = 0
+        shard_ids = get_shard_ids()
+        # Con varios shards el directorio indica qué usuarios se están moviendo
+        catalog = get_session(CATALOG_SHARD) if len(shard_ids) > 1 else None
+        try:
+            for shard_id in shard_ids:
+                db = get_session(shard_id)
+                try:
+                    archived += archive_completed_tasks(db, self.older_than_days, self.batch_size, catalog)
+                finally:
+                    db.close()
+        finally:
+            if catalog is not None:
+                catalog.close()
+        return archived
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                archived = self.run_once()
+                if archived:
+                    logger.info("Archivadas %d tareas completadas", archived)
+            except Exception:
+                logger.exception("Error archivando tareas completadas")
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="archive-job", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,220 @@
+import heapq
+import logging
+import queue
+import select
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from ..database import CATALOG_SHARD, get_engine, get_session
+from ..services.reminder_service import (
+    REMINDER_CHANNEL, Reminder, ReminderSink, get_task_reminder, get_upcoming_reminders,
+    mark_reminder_sent, register_local_listener, unregister_local_listener
+)
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock de Postgres: solo un worker ejecuta el scheduler
+REMINDER_LOCK_KEY = 0x52454D44  # "REMD"
+
+class ReminderScheduler:
+    """
+    Dispara recordatorios cuando se acerca la fecha de finalización de las tareas.
+
+    Mantiene en memoria un min-heap con las tareas que vencen dentro del
+    horizonte configurado. El horizonte se amplía de forma incremental con
+    consultas por rango sobre (completed, end_date) y los cambios en tareas
+    concretas llegan por LISTEN/NOTIFY (o por aviso local fuera de Postgres),
+    así que nunca se vuelve a recorrer la tabla completa.
+
+    Cada shard tiene su propio scheduler y su propio advisory lock.
+    """
+
+    def __init__(self, sink: ReminderSink, lead_minutes: int, horizon_minutes: int, poll_seconds: int,
+                 shard_id: int = CATALOG_SHARD):
+        self.sink = sink
+        self.shard_id = shard_id
+        self.lead = timedelta(minutes=lead_minutes)
+        self.horizon = timedelta(minutes=horizon_minutes)
+        self.poll_seconds = poll_seconds
+
+        self._heap: List[Tuple[datetime, int, Reminder]] = []
+        self._scheduled: Dict[int, Reminder] = {}
+        self._loaded_until: Optional[datetime] = None
+        self._changed: "queue.SimpleQueue[int]" = queue.SimpleQueue()
+
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_conn = None
+
+    # Avisos de cambios
+
+    def task_changed(self, task_id: int) -> None:
+        """Encola una tarea para volver a evaluar su recordatorio."""
+        self._changed.put(task_id)
+        self._wakeup.set()
+
+    # Estado en memoria
+
+    def _push(self, reminder: Reminder) -> None:
+        self._scheduled[reminder.task_id] = reminder
+        heapq.heappush(self._heap, (reminder.end_date - self.lead, reminder.task_id, reminder))
+
+    def _reset(self) -> None:
+        self._heap.clear()
+        self._scheduled.clear()
+        self._loaded_until = None
+
+    def _extend_window(self, now: datetime) -> None:
+        """Carga las tareas que entran en el horizonte desde la última carga."""
+        until = now + self.horizon
+        after = self._loaded_until or now
+        if until <= after:
+            return
+        db = get_session(self.shard_id)
+        try:
+            for reminder in get_upcoming_reminders(db, after, until):
+                self._push(reminder)
+        finally:
+            db.close()
+        self._loaded_until = until
+
+    def _apply_changes(self) -> None:
+        """Reevalúa solo las tareas que cambiaron (las entradas viejas del heap quedan obsoletas)."""
+        task_ids = set()
+        while True:
+            try:
+                task_ids.add(self._changed.get_nowait())
+            except queue.Empty:
+                break
+        if not task_ids:
+            return
+
+        db = get_session(self.shard_id)
+        try:
+            for task_id in task_ids:
+                self._scheduled.pop(task_id, None)
+                reminder = get_task_reminder(db, task_id)
+                # Las fechas fuera del horizonte se cargarán al ampliarlo
+                if reminder is not None and reminder.end_date <= self._loaded_until:
+                    self._push(reminder)
+        finally:
+            db.close()
+
+    def _fire_due(self, now: datetime) -> None:
+        db = None
+        try:
+            while self._heap and self._heap[0][0] <= now:
+                _, task_id, reminder = heapq.heappop(self._heap)
+                if self._scheduled.get(task_id) is not reminder:
+                    continue  # Entrada obsoleta
+                del self._scheduled[task_id]
+                if reminder.end_date <= now:
+                    continue  # Ya venció
+                db = db or get_session(self.shard_id)
+                if mark_reminder_sent(db, task_id, reminder.end_date):
+                    try:
+                        self.sink.send(reminder)
+                    except Exception:
+                        logger.exception("Error enviando el recordatorio de la tarea %s", task_id)
+        finally:
+            if db is not None:
+                db.close()
+
+    def _seconds_until_next(self, now: datetime) -> float:
+        timeout = float(self.poll_seconds)
+        if self._heap:
+            timeout = min(timeout, (self._heap[0][0] - now).total_seconds())
+        return max(timeout, 0.0)
+
+    # Coordinación entre workers
+
+    def _uses_postgres(self) -> bool:
+        return get_engine(self.shard_id).dialect.name == "postgresql"
+
+    def _try_acquire_leadership(self) -> bool:
+        if not self._uses_postgres():
+            return True
+
+        conn = get_engine(self.shard_id).connect().execution_options(isolation_level="AUTOCOMMIT")
+        acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": REMINDER_LOCK_KEY}).scalar()
+        if not acquired:
+            conn.close()
+            return False
+        # La conexión se mantiene abierta: el lock dura lo que dure la sesión
+        conn.execute(text(f"LISTEN {REMINDER_CHANNEL}"))
+        self._lock_conn = conn
+        return True
+
+    def _release_leadership(self) -> None:
+        if self._lock_conn is not None:
+            # El lock y el LISTEN son de la sesión y el pool no los limpia al
+            # devolver la conexión: se liberan antes o se descarta la conexión
+            try:
+                self._lock_conn.execute(text("UNLISTEN *"))
+                self._lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": REMINDER_LOCK_KEY})
+            except Exception:
+                self._lock_conn.invalidate()
+            try:
+                self._lock_conn.close()
+            except Exception:
+                pass
+            self._lock_conn = None
+        self._reset()
+
+    def _wait(self, timeout: float) -> None:
+        """Espera hasta el próximo recordatorio, un NOTIFY o un aviso local."""
+        if self._lock_conn is None:
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            return
+
+        dbapi_conn = self._lock_conn.connection.dbapi_connection
+        select.select([dbapi_conn], [], [], timeout)
+        dbapi_conn.poll()
+        while dbapi_conn.notifies:
+            notify = dbapi_conn.notifies.pop(0)
+            self._changed.put(int(notify.payload))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self._lock_conn is None and self._loaded_until is None:
+                    if not self._try_acquire_leadership():
+                        self._stop.wait(self.poll_seconds)
+                        continue
+                    logger.info("Scheduler de recordatorios del shard %s activo en este proceso", self.shard_id)
+
+                now = datetime.utcnow()
+                if self._loaded_until is None:
+                    self._extend_window(now)
+                self._apply_changes()
+                self._fire_due(now)
+                self._extend_window(now)
+                self._wait(self._seconds_until_next(datetime.utcnow()))
+            except Exception:
+                logger.exception("Error en el scheduler de recordatorios")
+                self._release_leadership()
+                self._stop.wait(self.poll_seconds)
+
+        self._release_leadership()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        if not self._uses_postgres():
+            register_local_listener(self.task_changed)
+        self._thread = threading.Thread(target=self._run, name=f"reminder-scheduler-{self.shard_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        unregister_local_listener(self.task_changed)
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 5)
+            self._thread = None
@@ -5,6 +5,8 @@ Inicialización del paquete models
 from app.database import Base
 from .user import User
 from .task import Task, Subtask
+from .archive import ArchivedTask, ArchivedSubtask
+from .shard import UserDirectory
 
 # Esto asegura que todas las tablas compartan la misma Base
-__all__ = ['Base', 'User', 'Task', 'Subtask'] 
\ No newline at end of file
+__all__ = ['Base', 'User', 'Task', 'Subtask', 'ArchivedTask', 'ArchivedSubtask', 'UserDirectory']
\ No newline at end of file
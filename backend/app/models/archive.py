@@ -0,0 +1,41 @@
+from sqlalchemy import Column, BigInteger, String, DateTime, Boolean, ForeignKey
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from ..database import Base
+from .task import PositionType
+
+class ArchivedTask(Base):
+    """Tarea completada movida fuera de la tabla activa `tasks`."""
+    __tablename__ = "tasks_archive"
+
+    # Se conserva el id original de la tarea
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    title = Column(String)
+    start_date = Column(DateTime, nullable=True)
+    end_date = Column(DateTime, nullable=True)
+    completed = Column(Boolean, default=True)
+    completed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    user_id = Column(BigInteger, ForeignKey("users.id"), index=True)
+
+    # Relación
+    subtasks = relationship(
+        "ArchivedSubtask",
+        back_populates="parent_task",
+        cascade="all, delete-orphan",
+        order_by="(ArchivedSubtask.position, ArchivedSubtask.id)",
+    )
+
+class ArchivedSubtask(Base):
+    """Subtarea de una tarea archivada."""
+    __tablename__ = "subtasks_archive"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    title = Column(String)
+    completed = Column(Boolean, default=False)
+    task_id = Column(BigInteger, ForeignKey("tasks_archive.id"), index=True)
+    position = Column(PositionType, nullable=False, server_default="i")
+
+    # Relación
+    parent_task = relationship("ArchivedTask", back_populates="subtasks")
\ No newline at end of file
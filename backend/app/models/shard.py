@@ -0,0 +1,18 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Boolean
+from ..database import Base
+
+class UserDirectory(Base):
+    """
+    Directorio global de usuarios: indica en qué shard vive cada usuario.
+
+    Solo se usa en el shard catálogo, donde además garantiza que email y
+    username sean únicos entre todos los shards.
+    """
+    __tablename__ = "user_directory"
+
+    user_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    email = Column(String, unique=True, index=True, nullable=False)
+    username = Column(String, unique=True, index=True, nullable=False)
+    shard_id = Column(Integer, nullable=False)
+    # Activo mientras el usuario se mueve de shard; sus peticiones esperan
+    moving = Column(Boolean, default=False, nullable=False)
\ No newline at end of file
@@ -1,30 +1,54 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, BigInteger, String, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
+from ..core.ids import generate_id
+
+# Las posiciones se comparan byte a byte; en Postgres se fuerza la collation "C"
+PositionType = String().with_variant(String(collation="C"), "postgresql")
 
 class Task(Base):
     __tablename__ = "tasks"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, primary_key=True, index=True, autoincrement=False, default=generate_id)
     title = Column(String, index=True)
     start_date = Column(DateTime, nullable=True)
     end_date = Column(DateTime, nullable=True)
     completed = Column(Boolean, default=False)
+    completed_at = Column(DateTime, nullable=True)
+    reminder_sent_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(BigInteger, ForeignKey("users.id"))
 
     # Relaciones
     owner = relationship("User", back_populates="tasks")
-    subtasks = relationship("Subtask", back_populates="parent_task", cascade="all, delete-orphan")
+    subtasks = relationship(
+        "Subtask",
+        back_populates="parent_task",
+        cascade="all, delete-orphan",
+        order_by="(Subtask.position, Subtask.id)",
+    )
+
+    __table_args__ = (
+        # Usado por el job de archivado para encontrar tareas completadas antiguas
+        Index("ix_tasks_completed_completed_at", "completed", "completed_at"),
+        # Usado por el scheduler de recordatorios para cargar los próximos vencimientos
+        Index("ix_tasks_completed_end_date", "completed", "end_date"),
+    )
 
 class Subtask(Base):
     __tablename__ = "subtasks"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, primary_key=True, index=True, autoincrement=False, default=generate_id)
     title = Column(String, index=True)
     completed = Column(Boolean, default=False)
-    task_id = Column(Integer, ForeignKey("tasks.id"))
+    task_id = Column(BigInteger, ForeignKey("tasks.id"))
+    # Posición fraccionaria dentro de la tarea (ver app.core.ranks)
+    position = Column(PositionType, nullable=False, server_default="i")
 
     # Relación
-    parent_task = relationship("Task", back_populates="subtasks") 
\ No newline at end of file
+    parent_task = relationship("Task", back_populates="subtasks")
+
+    __table_args__ = (
+        Index("ix_subtasks_task_id_position", "task_id", "position"),
+    )
\ No newline at end of file
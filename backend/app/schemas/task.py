@@ -12,6 +12,7 @@ class SubtaskCreate(SubtaskBase):
 class Subtask(SubtaskBase):
     id: int
     task_id: int
+    position: str
 
     class Config:
         from_attributes = True
@@ -34,8 +35,28 @@ class TaskUpdate(BaseModel):
 class Task(TaskBase):
     id: int
     created_at: datetime
+    completed_at: Optional[datetime] = None
     user_id: int
     subtasks: List[Subtask] = []
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class ArchivedSubtask(SubtaskBase):
+    id: int
+    task_id: int
+    position: str
+
+    class Config:
+        from_attributes = True
+
+class ArchivedTask(TaskBase):
+    id: int
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    archived_at: datetime
+    user_id: int
+    subtasks: List[ArchivedSubtask] = []
+
+    class Config:
+        from_attributes = True
\ No newline at end of file
@@ -0,0 +1,102 @@
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import select, insert, delete, literal, and_, or_
+from typing import Collection, List, Optional
+from datetime import datetime, timedelta
+
+from ..models.task import Task, Subtask
+from ..models.archive import ArchivedTask, ArchivedSubtask
+from .shard_service import get_moving_user_ids
+
+TASK_COLUMNS = ["id", "title", "start_date", "end_date", "completed", "completed_at", "created_at", "user_id"]
+SUBTASK_COLUMNS = ["id", "title", "completed", "task_id", "position"]
+
+def _next_batch(db: Session, cutoff: datetime, batch_size: int, skip_user_ids: Collection[int] = ()) -> List[int]:
+    """Selecciona y bloquea el siguiente lote de tareas archivables."""
+    query = db.query(Task.id).filter(
+        Task.completed == True,
+        or_(
+            Task.completed_at < cutoff,
+            # Tareas completadas antes de existir `completed_at`
+            and_(Task.completed_at.is_(None), Task.created_at < cutoff),
+        ),
+    )
+    if skip_user_ids:
+        query = query.filter(Task.user_id.notin_(skip_user_ids))
+    rows = (
+        query
+        .order_by(Task.id)
+        .limit(batch_size)
+        # Varios workers pueden ejecutar el job a la vez sin pisarse
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    return [row.id for row in rows]
+
+def _move_batch(db: Session, task_ids: List[int]) -> None:
+    """Copia un lote de tareas (y sus subtareas) al archivo y las borra de las tablas activas."""
+    archived_at = datetime.utcnow()
+
+    db.execute(
+        insert(ArchivedTask).from_select(
+            TASK_COLUMNS + ["archived_at"],
+            select(*[getattr(Task, c) for c in TASK_COLUMNS], literal(archived_at)).where(Task.id.in_(task_ids)),
+        )
+    )
+    db.execute(
+        insert(ArchivedSubtask).from_select(
+            SUBTASK_COLUMNS,
+            select(*[getattr(Subtask, c) for c in SUBTASK_COLUMNS]).where(Subtask.task_id.in_(task_ids)),
+        )
+    )
+    db.execute(delete(Subtask).where(Subtask.task_id.in_(task_ids)))
+    db.execute(delete(Task).where(Task.id.in_(task_ids)))
+
+def archive_completed_tasks(db: Session, older_than_days: int, batch_size: int = 500,
+                            catalog_db: Optional[Session] = None) -> int:
+    """
+    Mueve al archivo las tareas completadas hace más de `older_than_days` días.
+
+    Cada lote se confirma en su propia transacción para no mantener bloqueos
+    largos sobre las tablas activas. Con varios shards se pasa `catalog_db`
+    para saltar a los usuarios que se están moviendo de shard.
+
+    Returns:
+        Número de tareas archivadas
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+
+    while True:
+        skip_user_ids = []
+        if catalog_db is not None:
+            skip_user_ids = get_moving_user_ids(catalog_db)
+            catalog_db.rollback()
+        task_ids = _next_batch(db, cutoff, batch_size, skip_user_ids)
+        if not task_ids:
+            db.rollback()
+            break
+
+        try:
+            _move_batch(db, task_ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        archived += len(task_ids)
+        if len(task_ids) < batch_size:
+            break
+
+    return archived
+
+def get_user_archived_tasks(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[ArchivedTask]:
+    """Obtiene las tareas archivadas de un usuario, las más recientes primero."""
+    return (
+        db.query(ArchivedTask)
+        .options(selectinload(ArchivedTask.subtasks))
+        .filter(ArchivedTask.user_id == user_id)
+        .order_by(ArchivedTask.completed_at.desc().nulls_last(), ArchivedTask.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
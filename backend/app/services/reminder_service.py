@@ -0,0 +1,127 @@
+import importlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Protocol
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session
+
+from ..models.task import Task
+
+logger = logging.getLogger(__name__)
+
+# Canal de Postgres por el que se avisa de cambios en las fechas de las tareas
+REMINDER_CHANNEL = "task_reminders"
+
+@dataclass
+class Reminder:
+    """Aviso de que la fecha de finalización de una tarea se acerca."""
+    task_id: int
+    user_id: int
+    title: str
+    end_date: datetime
+
+class ReminderSink(Protocol):
+    """Destino de los recordatorios (log, email, webhook, cola...)."""
+
+    def send(self, reminder: Reminder) -> None:
+        ...
+
+class LogReminderSink:
+    """Sink por defecto: escribe los recordatorios en el log."""
+
+    def send(self, reminder: Reminder) -> None:
+        logger.info(
+            "Recordatorio: la tarea %s (%s) del usuario %s vence el %s",
+            reminder.task_id, reminder.title, reminder.user_id, reminder.end_date
+        )
+
+def load_sink(path: str) -> ReminderSink:
+    """Instancia un sink a partir de una ruta `modulo:Clase`."""
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+def _to_reminder(task: Task) -> Reminder:
+    return Reminder(task_id=task.id, user_id=task.user_id, title=task.title, end_date=task.end_date)
+
+def get_upcoming_reminders(db: Session, after: datetime, until: datetime) -> List[Reminder]:
+    """
+    Obtiene las tareas pendientes que vencen en el rango (after, until].
+
+    Usa el índice (completed, end_date) de la tabla de tareas.
+    """
+    tasks = (
+        db.query(Task.id, Task.user_id, Task.title, Task.end_date)
+        .filter(
+            Task.completed == False,
+            Task.end_date > after,
+            Task.end_date <= until,
+            Task.reminder_sent_at.is_(None),
+        )
+        .all()
+    )
+    return [_to_reminder(task) for task in tasks]
+
+def get_task_reminder(db: Session, task_id: int) -> Optional[Reminder]:
+    """Obtiene el recordatorio pendiente de una tarea, si todavía le corresponde uno."""
+    task = (
+        db.query(Task.id, Task.user_id, Task.title, Task.end_date)
+        .filter(
+            Task.id == task_id,
+            Task.completed == False,
+            Task.end_date.isnot(None),
+            Task.reminder_sent_at.is_(None),
+        )
+        .first()
+    )
+    return _to_reminder(task) if task else None
+
+def mark_reminder_sent(db: Session, task_id: int, end_date: datetime) -> bool:
+    """
+    Marca el recordatorio como enviado.
+
+    Solo tiene efecto si la tarea sigue pendiente y la fecha no cambió
+    mientras tanto; devuelve False si otro proceso ya lo envió o la tarea fue
+    modificada o completada.
+    """
+    result = db.execute(
+        update(Task)
+        .where(
+            Task.id == task_id,
+            Task.completed == False,
+            Task.end_date == end_date,
+            Task.reminder_sent_at.is_(None),
+        )
+        .values(reminder_sent_at=datetime.utcnow())
+    )
+    db.commit()
+    return result.rowcount == 1
+
+# Schedulers del propio proceso que deben enterarse de los cambios cuando no
+# hay LISTEN/NOTIFY disponible (p. ej. bases de datos que no son Postgres)
+_local_listeners: List[Callable[[int], None]] = []
+
+def register_local_listener(listener: Callable[[int], None]) -> None:
+    _local_listeners.append(listener)
+
+def unregister_local_listener(listener: Callable[[int], None]) -> None:
+    if listener in _local_listeners:
+        _local_listeners.remove(listener)
+
+def publish_task_change(db: Session, task_id: int) -> None:
+    """
+    Avisa al scheduler de recordatorios de que una tarea cambió.
+
+    Debe llamarse antes del commit: en Postgres el NOTIFY viaja con la misma
+    transacción, de modo que el scheduler solo lo recibe si el cambio se confirma.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_notify(REMINDER_CHANNEL, str(task_id))))
+        return
+
+    if _local_listeners:
+        def notify(session):
+            for listener in list(_local_listeners):
+                listener(task_id)
+        event.listen(db, "after_commit", notify, once=True)
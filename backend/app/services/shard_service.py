@@ -0,0 +1,192 @@
+import time
+import zlib
+from typing import List, Optional
+
+from sqlalchemy import select, insert, delete, exists
+from sqlalchemy.orm import Session
+
+from ..database import CATALOG_SHARD, get_session, get_shard_ids
+from ..models.user import User
+from ..models.task import Task, Subtask
+from ..models.archive import ArchivedTask, ArchivedSubtask
+from ..models.shard import UserDirectory
+from .reminder_service import publish_task_change
+
+def choose_shard(user_id: int) -> int:
+    """Shard inicial de un usuario nuevo."""
+    # Los bits bajos de los ids (nodo y secuencia) apenas varían: se usa un hash
+    return zlib.crc32(user_id.to_bytes(8, "big")) % len(get_shard_ids())
+
+def get_directory_entry(catalog_db: Session, email: str) -> Optional[UserDirectory]:
+    """Busca en el directorio el shard de un usuario por su email."""
+    return catalog_db.query(UserDirectory).filter(UserDirectory.email == email).first()
+
+def _user_rows(user_id: int):
+    """
+    Consultas que seleccionan todas las filas de un usuario, tabla por tabla,
+    en orden de dependencias (padres primero).
+    """
+    task_ids = select(Task.id).where(Task.user_id == user_id)
+    archived_ids = select(ArchivedTask.id).where(ArchivedTask.user_id == user_id)
+    return [
+        (User.__table__, User.id == user_id),
+        (Task.__table__, Task.user_id == user_id),
+        (Subtask.__table__, Subtask.task_id.in_(task_ids)),
+        (ArchivedTask.__table__, ArchivedTask.user_id == user_id),
+        (ArchivedSubtask.__table__, ArchivedSubtask.task_id.in_(archived_ids)),
+    ]
+
+def _copy_user_rows(source: Session, target: Session, user_id: int) -> List[dict]:
+    """Copia las filas del usuario al shard destino y devuelve las tareas copiadas."""
+    # Todas las lecturas sobre la misma foto del origen: con READ COMMITTED
+    # cada SELECT vería un estado distinto si algo (p. ej. el archivado)
+    # moviera filas del usuario a mitad de la copia
+    if source.get_bind().dialect.name == "postgresql":
+        source.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    try:
+        tables = [
+            (table, source.execute(select(table).where(condition)).mappings().all())
+            for table, condition in _user_rows(user_id)
+        ]
+    finally:
+        source.rollback()
+
+    copied_tasks = []
+    for table, rows in tables:
+        if rows:
+            target.execute(insert(table), [dict(row) for row in rows])
+        if table is Task.__table__:
+            copied_tasks = [dict(row) for row in rows]
+    return copied_tasks
+
+def get_moving_user_ids(catalog_db: Session) -> List[int]:
+    """Usuarios que se están moviendo de shard; sus filas no deben tocarse."""
+    return list(catalog_db.scalars(select(UserDirectory.user_id).where(UserDirectory.moving == True)))
+
+def _delete_user_rows(db: Session, user_id: int) -> None:
+    # Hijos primero: las subconsultas de las subtareas aún encuentran sus tareas
+    for table, condition in reversed(_user_rows(user_id)):
+        db.execute(delete(table).where(condition))
+
+def backfill_directory(shard_id: int = CATALOG_SHARD) -> int:
+    """
+    Registra en el directorio a los usuarios de un shard que aún no figuran
+    en él (p. ej. usuarios creados antes de activar el sharding).
+
+    Returns:
+        Número de usuarios añadidos
+    """
+    catalog = get_session(CATALOG_SHARD)
+    shard = get_session(shard_id)
+    try:
+        known_ids = set(catalog.scalars(select(UserDirectory.user_id)))
+        users = shard.query(User.id, User.email, User.username).all()
+        missing = [
+            {"user_id": u.id, "email": u.email, "username": u.username, "shard_id": shard_id, "moving": False}
+            for u in users if u.id not in known_ids
+        ]
+        if missing:
+            catalog.execute(insert(UserDirectory), missing)
+            catalog.commit()
+        return len(missing)
+    finally:
+        shard.close()
+        catalog.close()
+
+def ensure_directory_complete() -> None:
+    """
+    Comprueba que todos los usuarios del catálogo figuran en el directorio.
+
+    Con varios shards la unicidad de email y username solo se comprueba en el
+    directorio: un usuario anterior al sharding que no esté en él podría
+    registrarse otra vez en otro shard.
+
+    Raises:
+        RuntimeError: Si quedan usuarios por registrar en el directorio
+    """
+    catalog = get_session(CATALOG_SHARD)
+    try:
+        registered = exists().where(UserDirectory.user_id == User.id)
+        missing = catalog.query(User.id).filter(~registered).first()
+    finally:
+        catalog.close()
+    if missing is not None:
+        raise RuntimeError(
+            "Hay usuarios del catálogo que no están en el directorio: "
+            "ejecute `python main.py shards backfill` antes de arrancar con varios shards"
+        )
+
+def move_user(user_id: int, target_shard: int, grace_seconds: float = 2.0) -> None:
+    """
+    Mueve un usuario con todas sus tareas a otro shard sin detener el servicio.
+
+    Mientras dura la copia el usuario queda marcado como `moving` y sus
+    peticiones reciben un 503 con Retry-After; el resto de usuarios no se ve
+    afectado. `grace_seconds` deja terminar las peticiones que ya estaban en
+    curso antes de empezar a copiar.
+    """
+    if target_shard not in get_shard_ids():
+        raise ValueError(f"El shard {target_shard} no existe")
+
+    catalog = get_session(CATALOG_SHARD)
+    try:
+        entry = (
+            catalog.query(UserDirectory)
+            .filter(UserDirectory.user_id == user_id)
+            .with_for_update()
+            .first()
+        )
+        if entry is None:
+            raise ValueError(f"El usuario {user_id} no está en el directorio")
+        if entry.moving:
+            raise ValueError(f"El usuario {user_id} ya se está moviendo")
+        source_shard = entry.shard_id
+        if source_shard == target_shard:
+            catalog.rollback()
+            return
+
+        entry.moving = True
+        catalog.commit()
+        time.sleep(grace_seconds)
+
+        source = get_session(source_shard)
+        target = get_session(target_shard)
+        try:
+            try:
+                copied_tasks = _copy_user_rows(source, target, user_id)
+                target.commit()
+            except Exception:
+                target.rollback()
+                raise
+
+            try:
+                entry.shard_id = target_shard
+                entry.moving = False
+                catalog.commit()
+            except Exception:
+                # El directorio sigue apuntando al origen: descartar la copia
+                catalog.rollback()
+                _delete_user_rows(target, user_id)
+                target.commit()
+                raise
+
+            # El scheduler del destino ya cargó su ventana sin estas tareas y el
+            # del origen ya no podrá marcarlas: se avisa al destino
+            for task in copied_tasks:
+                if task["end_date"] is not None and not task["completed"] and task["reminder_sent_at"] is None:
+                    publish_task_change(target, task["id"])
+            target.commit()
+
+            _delete_user_rows(source, user_id)
+            source.commit()
+        except Exception:
+            entry = catalog.get(UserDirectory, user_id)
+            if entry is not None and entry.moving:
+                entry.moving = False
+                catalog.commit()
+            raise
+        finally:
+            source.close()
+            target.close()
+    finally:
+        catalog.close()
@@ -1,14 +1,28 @@
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from datetime import datetime
 
 from ..models.task import Task, Subtask
 from ..schemas.task import TaskCreate, TaskUpdate, SubtaskCreate
+from ..core.config import get_settings
+from ..core.ranks import key_between, even_keys
+from ..database import get_session
+from .reminder_service import publish_task_change
+
+# Campos que afectan a los recordatorios de vencimiento
+REMINDER_FIELDS = {"end_date", "completed"}
 
 def create_task(db: Session, task: TaskCreate, user_id: int) -> Task:
     """Crea una nueva tarea para el usuario."""
     db_task = Task(**task.model_dump(), user_id=user_id)
+    if db_task.completed:
+        db_task.completed_at = datetime.utcnow()
     db.add(db_task)
+    if db_task.end_date is not None and not db_task.completed:
+        db.flush()
+        publish_task_change(db, db_task.id)
     db.commit()
     db.refresh(db_task)
     return db_task
@@ -61,13 +75,32 @@ def update_task(db: Session, task_id: int, user_id: int, task_update: TaskUpdate
     task = get_task(db, task_id, user_id)
     
     update_data = task_update.model_dump(exclude_unset=True)
+    reminder_changed = False
     for field, value in update_data.items():
+        # Los clientes suelen reenviar la tarea completa: solo cuentan los
+        # campos cuyo valor cambia de verdad
+        if field in REMINDER_FIELDS and value != getattr(task, field):
+            reminder_changed = True
+            # Una nueva fecha de finalización necesita un nuevo recordatorio
+            if field == 'end_date':
+                task.reminder_sent_at = None
+
         setattr(task, field, value)
         
         # Si la tarea se marca como completada, completar todas las subtareas
         if field == 'completed' and value is True:
             for subtask in task.subtasks:
                 subtask.completed = True
+
+        # Registrar cuándo se completó (lo usa el job de archivado)
+        if field == 'completed':
+            if not value:
+                task.completed_at = None
+            elif task.completed_at is None:
+                task.completed_at = datetime.utcnow()
+
+    if reminder_changed:
+        publish_task_change(db, task.id)
     
     db.commit()
     db.refresh(task)
@@ -80,11 +113,22 @@ def delete_task(db: Session, task_id: int, user_id: int) -> None:
     # Las subtareas se eliminarán automáticamente debido a la relación cascade
     # definida en el modelo Task: cascade="all, delete-orphan"
     db.delete(task)
+    if task.end_date is not None and not task.completed:
+        publish_task_change(db, task_id)
     db.commit()
 
-def validate_task_ownership(db: Session, task_id: int, user_id: int) -> Task:
-    """Valida que una tarea exista y pertenezca al usuario."""
-    task = db.query(Task).filter(Task.id == task_id, Task.user_id == user_id).first()
+def validate_task_ownership(db: Session, task_id: int, user_id: int, lock: bool = False) -> Task:
+    """
+    Valida que una tarea exista y pertenezca al usuario.
+
+    Con `lock` bloquea la fila de la tarea hasta el final de la transacción:
+    así se serializan las operaciones que leen y reescriben las posiciones de
+    sus subtareas (añadir, mover y rebalancear).
+    """
+    query = db.query(Task).filter(Task.id == task_id, Task.user_id == user_id)
+    if lock:
+        query = query.with_for_update()
+    task = query.first()
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -105,9 +149,11 @@ def get_subtask(db: Session, subtask_id: int, task_id: int) -> Subtask:
 def create_subtask(db: Session, task_id: int, user_id: int, subtask: SubtaskCreate) -> Subtask:
     """Crea una nueva subtarea."""
     # Verificar que la tarea principal existe y pertenece al usuario
-    task = validate_task_ownership(db, task_id, user_id)
+    task = validate_task_ownership(db, task_id, user_id, lock=True)
     
-    db_subtask = Subtask(**subtask.model_dump(), task_id=task_id)
+    # Las subtareas nuevas se añaden al final
+    last_position = db.query(func.max(Subtask.position)).filter(Subtask.task_id == task_id).scalar()
+    db_subtask = Subtask(**subtask.model_dump(), task_id=task_id, position=key_between(last_position, None))
     db.add(db_subtask)
     db.commit()
     db.refresh(db_subtask)
@@ -135,4 +181,148 @@ def delete_subtask(db: Session, subtask_id: int, task_id: int, user_id: int) ->
     subtask = get_subtask(db, subtask_id, task_id)
     
     db.delete(subtask)
-    db.commit() 
\ No newline at end of file
+    db.commit() 
+
+def _neighbour_position(db: Session, task_id: int, subtask_id: int, position: str, after: bool) -> Optional[str]:
+    """Posición de la subtarea inmediatamente anterior o posterior a `position`."""
+    query = db.query(func.max(Subtask.position) if after else func.min(Subtask.position)).filter(
+        Subtask.task_id == task_id,
+        Subtask.id != subtask_id,
+        Subtask.position < position if after else Subtask.position > position,
+    )
+    return query.scalar()
+
+def _has_shared_positions(db: Session, task_id: int, subtask_ids: List[int]) -> bool:
+    """Indica si alguna de las subtareas comparte posición con otra de la misma tarea."""
+    positions = select(Subtask.position).where(Subtask.task_id == task_id, Subtask.id.in_(subtask_ids))
+    return (
+        db.query(Subtask.position)
+        .filter(Subtask.task_id == task_id, Subtask.position.in_(positions))
+        .group_by(Subtask.position)
+        .having(func.count() > 1)
+        .first()
+    ) is not None
+
+def _move_bounds(
+    db: Session,
+    task_id: int,
+    subtask_id: int,
+    after_id: Optional[int],
+    before_id: Optional[int]
+) -> Tuple[Optional[str], Optional[str]]:
+    """Posiciones entre las que debe quedar la subtarea movida."""
+    neighbour_ids = [i for i in (after_id, before_id) if i is not None]
+    positions = dict(
+        db.query(Subtask.id, Subtask.position)
+        .filter(Subtask.task_id == task_id, Subtask.id.in_(neighbour_ids))
+        .all()
+    )
+    if len(positions) != len(neighbour_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Subtarea vecina no encontrada"
+        )
+
+    lower = positions.get(after_id)
+    upper = positions.get(before_id)
+    # Con un solo vecino se busca el otro para no saltar por encima de nadie
+    if before_id is None:
+        upper = _neighbour_position(db, task_id, subtask_id, lower, after=False)
+    elif after_id is None:
+        lower = _neighbour_position(db, task_id, subtask_id, upper, after=True)
+    return lower, upper
+
+def move_subtask(
+    db: Session,
+    subtask_id: int,
+    task_id: int,
+    user_id: int,
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None
+) -> Subtask:
+    """
+    Mueve una subtarea entre dos subtareas de la misma tarea.
+
+    Solo se reescribe la posición de la subtarea movida.
+
+    Args:
+        db: Sesión de la base de datos
+        subtask_id: ID de la subtarea a mover
+        task_id: ID de la tarea padre
+        user_id: ID del usuario
+        after_id: Subtarea que quedará justo antes (opcional)
+        before_id: Subtarea que quedará justo después (opcional)
+
+    Returns:
+        La subtarea con su nueva posición
+    """
+    if after_id is None and before_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Debe indicar 'after' o 'before'"
+        )
+    if subtask_id in (after_id, before_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Una subtarea no puede moverse respecto a sí misma"
+        )
+
+    # Verificar que la tarea principal existe y pertenece al usuario
+    validate_task_ownership(db, task_id, user_id, lock=True)
+    subtask = get_subtask(db, subtask_id, task_id)
+
+    lower, upper = _move_bounds(db, task_id, subtask_id, after_id, before_id)
+    # Posiciones repetidas (subtareas anteriores a las posiciones comparten la
+    # inicial): con un solo vecino la búsqueda del otro saltaría las iguales,
+    # así que se reparten una vez y se vuelve a calcular
+    involved_ids = [i for i in (subtask_id, after_id, before_id) if i is not None]
+    if _has_shared_positions(db, task_id, involved_ids):
+        _spread_positions(db, task_id)
+        db.flush()
+        lower, upper = _move_bounds(db, task_id, subtask_id, after_id, before_id)
+
+    try:
+        new_position = key_between(lower, upper)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'after' debe ir antes que 'before'"
+        )
+
+    subtask.position = new_position
+    db.commit()
+    db.refresh(subtask)
+    return subtask
+
+def needs_rebalance(position: str) -> bool:
+    """Indica si las posiciones de una tarea se han vuelto demasiado largas."""
+    return len(position) > get_settings().SUBTASK_POSITION_MAX_LENGTH
+
+def _spread_positions(db: Session, task_id: int) -> None:
+    """Reasigna posiciones cortas y equiespaciadas (la tarea ya debe estar bloqueada)."""
+    subtasks = (
+        db.query(Subtask)
+        .filter(Subtask.task_id == task_id)
+        .order_by(Subtask.position, Subtask.id)
+        .all()
+    )
+    for subtask, position in zip(subtasks, even_keys(len(subtasks))):
+        subtask.position = position
+
+def rebalance_subtasks(db: Session, task_id: int) -> None:
+    """Reasigna posiciones cortas y equiespaciadas a todas las subtareas de una tarea."""
+    # Mismo bloqueo que al mover o añadir subtareas
+    task = db.query(Task).filter(Task.id == task_id).with_for_update().first()
+    if task is None:
+        db.rollback()
+        return
+    _spread_positions(db, task_id)
+    db.commit()
+
+def rebalance_subtasks_in_background(shard_id: int, task_id: int) -> None:
+    """Rebalancea en una sesión propia, fuera del ciclo de la petición."""
+    db = get_session(shard_id)
+    try:
+        rebalance_subtasks(db, task_id)
+    finally:
+        db.close()
\ No newline at end of file
@@ -1,11 +1,18 @@
+from sqlalchemy import insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from typing import Optional
-from datetime import timedelta
+from typing import NoReturn, Optional
+from datetime import datetime, timedelta
 
 from ..models.user import User
+from ..models.shard import UserDirectory
 from ..schemas.user import UserCreate, UserLogin
+from ..core.ids import generate_id
 from ..core.security import verify_password, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from ..database import CATALOG_SHARD, get_session, get_shard_ids
+from .shard_service import choose_shard
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     """Obtiene un usuario por su email."""
@@ -15,47 +22,171 @@ def get_user_by_username(db: Session, username: str) -> Optional[User]:
     """Obtiene un usuario por su nombre de usuario."""
     return db.query(User).filter(User.username == username).first()
 
-def create_user(db: Session, user: UserCreate) -> User:
-    """Crea un nuevo usuario."""
-    # Verificar si el email ya existe
-    if get_user_by_email(db, user.email):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El email ya está registrado"
-        )
-    
-    # Verificar si el username ya existe
-    if get_user_by_username(db, user.username):
+def get_hashed_password(db: Session, email: str) -> Optional[str]:
+    """Obtiene solo el hash de la contraseña de un usuario (lo único que necesita el login)."""
+    return db.execute(select(User.hashed_password).where(User.email == email)).scalar()
+
+def _insert_ignoring_conflicts(db: Session, model, values: dict, returning):
+    """
+    INSERT ... ON CONFLICT (email) DO NOTHING RETURNING en una sola sentencia.
+
+    Solo se ignora el choque por email, el caso habitual: ON CONFLICT admite
+    un único objetivo, así que un username repetido o una colisión de clave
+    primaria siguen lanzando IntegrityError.
+
+    Returns:
+        El valor de `returning`, o None si el email ya estaba registrado
+    """
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = (
+        dialect.insert(model)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[model.email])
+        .returning(returning)
+    )
+    return db.execute(stmt).scalar()
+
+def _raise_conflict(db: Session, model, user: UserCreate, error: Optional[IntegrityError] = None) -> NoReturn:
+    """
+    Traduce un conflicto del INSERT al error 400 que corresponda.
+
+    Sin `error` el INSERT ignoró la fila por ON CONFLICT (email) y no hace
+    falta consultar nada. Con la IntegrityError del INSERT se comprueba qué
+    chocó: si ni el email ni el username están repetidos (p. ej. una colisión
+    de clave primaria) el problema no es del usuario y se relanza tal cual.
+    """
+    email_taken = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="El email ya está registrado"
+    )
+    if error is None:
+        raise email_taken
+
+    matches = db.execute(
+        select(model.email, model.username).where(or_(model.email == user.email, model.username == user.username))
+    ).all()
+    if any(match.email == user.email for match in matches):
+        raise email_taken
+    if any(match.username == user.username for match in matches):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El nombre de usuario ya está en uso"
         )
-    
-    # Crear el usuario
+    raise error
+
+def _insert_unique(db: Session, model, values: dict, returning, user: UserCreate) -> None:
+    """Inserta la fila o lanza el error 400 que corresponda si email o username ya existen."""
+    try:
+        inserted = _insert_ignoring_conflicts(db, model, values, returning)
+    except IntegrityError as exc:
+        db.rollback()
+        _raise_conflict(db, model, user, exc)
+    if inserted is None:
+        db.rollback()
+        _raise_conflict(db, model, user)
+
+def _insert_user(db: Session, values: dict, user: UserCreate) -> None:
+    """
+    Inserta el usuario en su shard una vez reservado en el directorio.
+
+    Si aun así choca (p. ej. con un usuario anterior al sharding que no se
+    registró en el directorio) se traduce igual que en el directorio.
+    """
+    try:
+        db.execute(insert(User).values(**values))
+    except IntegrityError as exc:
+        db.rollback()
+        _raise_conflict(db, User, user, exc)
+
+def create_user(db: Session, user: UserCreate) -> User:
+    """
+    Crea un nuevo usuario.
+
+    `db` es la sesión del shard catálogo. La unicidad de email y username se
+    comprueba en el propio INSERT (ON CONFLICT DO NOTHING), sin SELECT previos
+    y sin carreras entre registros simultáneos.
+    """
     hashed_password = get_password_hash(user.password)
-    db_user = User(
-        email=user.email,
-        username=user.username,
-        hashed_password=hashed_password
-    )
-    
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    values = {
+        "id": generate_id(),
+        "email": user.email,
+        "username": user.username,
+        "hashed_password": hashed_password,
+        "created_at": datetime.utcnow(),
+    }
+
+    # Un único shard: bastan las restricciones UNIQUE de la tabla users
+    if len(get_shard_ids()) == 1:
+        _insert_unique(db, User, values, User.id, user)
+        db.commit()
+        return User(**values)
+
+    # Varios shards: el directorio del catálogo reserva email y username
+    shard_id = choose_shard(values["id"])
+    entry = {
+        "user_id": values["id"],
+        "email": user.email,
+        "username": user.username,
+        "shard_id": shard_id,
+        "moving": False,
+    }
+    _insert_unique(db, UserDirectory, entry, UserDirectory.user_id, user)
+
+    if shard_id == CATALOG_SHARD:
+        _insert_user(db, values, user)
+        db.commit()
+        return User(**values)
+
+    # Si falla el commit del catálogo se deshace el usuario en su shard
+    shard_db = get_session(shard_id)
+    try:
+        _insert_user(shard_db, values, user)
+        shard_db.commit()
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            shard_db.execute(User.__table__.delete().where(User.id == values["id"]))
+            shard_db.commit()
+            raise
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        shard_db.close()
     
-    return db_user
+    return User(**values)
 
 def authenticate_user(db: Session, user_data: UserLogin) -> dict:
-    """Autentica un usuario y retorna el token de acceso."""
-    user = get_user_by_email(db, user_data.email)
+    """
+    Autentica un usuario y retorna el token de acceso.
+
+    `db` es la sesión del shard catálogo, donde se busca el shard del usuario.
+    """
+    shard_id = CATALOG_SHARD
+    if len(get_shard_ids()) > 1:
+        directory_shard = db.execute(
+            select(UserDirectory.shard_id).where(UserDirectory.email == user_data.email)
+        ).scalar()
+        if directory_shard is not None:
+            shard_id = directory_shard
+
+    if shard_id == CATALOG_SHARD:
+        hashed_password = get_hashed_password(db, user_data.email)
+    else:
+        shard_db = get_session(shard_id)
+        try:
+            hashed_password = get_hashed_password(shard_db, user_data.email)
+        finally:
+            shard_db.close()
     
-    if not user:
+    if not hashed_password:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos"
         )
     
-    if not verify_password(user_data.password, user.hashed_password):
+    if not verify_password(user_data.password, hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos"
@@ -64,11 +195,11 @@ def authenticate_user(db: Session, user_data: UserLogin) -> dict:
     # Crear token de acceso
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email},
+        data={"sub": user_data.email},
         expires_delta=access_token_expires
     )
     
     return {
         "access_token": access_token,
         "token_type": "bearer"
-    } 
\ No newline at end of file
+    }
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+Benchmark de registro y login: ruta anterior frente a la actual.
+
+Mide solo el acceso a la base de datos (el hash bcrypt se calcula una vez y
+se reutiliza) y cuenta las sentencias SQL que ejecuta cada operación.
+
+    python benchmarks/bench_auth.py                 # SQLite temporal
+    python benchmarks/bench_auth.py -n 5000 --threads 8
+    python benchmarks/bench_auth.py --from-env      # base de datos del .env
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+def _configure(args: argparse.Namespace) -> None:
+    # Debe ejecutarse antes de importar la aplicación (la configuración se cachea)
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+    if not args.from_env:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench_auth_"), "bench.db")
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = path
+        os.environ["SHARD_URLS"] = ""
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--iterations", type=int, default=2000, help="Registros (y logins) por ruta")
+    parser.add_argument("--threads", type=int, default=1, help="Peticiones concurrentes")
+    parser.add_argument("--from-env", action="store_true", help="Usar la base de datos configurada en .env")
+    args = parser.parse_args()
+    _configure(args)
+
+    from fastapi import HTTPException
+    from sqlalchemy import event
+    from app.core.security import get_password_hash
+    from app.database import get_engine, get_read_engine, get_session
+    from app.models import Base, User
+    from app.schemas.user import UserCreate
+    from app.services import user_service
+
+    Base.metadata.create_all(get_engine())
+
+    hashed_password = get_password_hash("benchmark")
+    # El hash de bcrypt no forma parte de lo que se mide
+    user_service.get_password_hash = lambda password: hashed_password
+
+    statements = threading.local()
+
+    def count_statement(*_):
+        statements.count = getattr(statements, "count", 0) + 1
+
+    for engine in {get_engine(), get_read_engine()}:
+        event.listen(engine, "before_cursor_execute", count_statement)
+
+    def legacy_register(db, user: UserCreate) -> None:
+        """Ruta anterior: dos SELECT, INSERT por el ORM y refresh."""
+        if user_service.get_user_by_email(db, user.email):
+            raise HTTPException(status_code=400, detail="El email ya está registrado")
+        if user_service.get_user_by_username(db, user.username):
+            raise HTTPException(status_code=400, detail="El nombre de usuario ya está en uso")
+        db_user = User(email=user.email, username=user.username, hashed_password=hashed_password)
+        db.add(db_user)
+        db.commit()
+        db.refresh(db_user)
+
+    def legacy_login(db, email: str) -> None:
+        """Ruta anterior: carga la fila completa del usuario."""
+        user = user_service.get_user_by_email(db, email)
+        assert user is not None and user.hashed_password
+
+    def current_register(db, user: UserCreate) -> None:
+        user_service.create_user(db, user)
+
+    def current_login(db, email: str) -> None:
+        assert user_service.get_hashed_password(db, email)
+
+    def run(label: str, operation: Callable) -> None:
+        def one(i: int) -> int:
+            statements.count = 0
+            db = get_session()
+            try:
+                operation(db, i)
+            finally:
+                db.close()
+            return statements.count
+
+        start = time.perf_counter()
+        if args.threads > 1:
+            with ThreadPoolExecutor(args.threads) as executor:
+                counts = list(executor.map(one, range(args.iterations)))
+        else:
+            counts = [one(i) for i in range(args.iterations)]
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"{label:<20} {args.iterations / elapsed:10.0f} ops/s"
+            f"  {elapsed / args.iterations * 1e6:8.0f} us/op"
+            f"  {sum(counts) / len(counts):5.1f} sentencias/op"
+        )
+
+    def new_user(prefix: str, i: int) -> UserCreate:
+        return UserCreate(email=f"{prefix}{i}@example.com", username=f"{prefix}{i}", password="benchmark")
+
+    print(f"Base de datos: {get_engine().url.render_as_string(hide_password=True)}")
+    print(f"Iteraciones: {args.iterations}, hilos: {args.threads}\n")
+    run("registro anterior", lambda db, i: legacy_register(db, new_user("old", i)))
+    run("registro actual", lambda db, i: current_register(db, new_user("new", i)))
+    run("login anterior", lambda db, i: legacy_login(db, f"old{i}@example.com"))
+    run("login actual", lambda db, i: current_login(db, f"new{i}@example.com"))
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
+from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import OAuth2PasswordBearer
 from app.api import auth, tasks
-from app.core.config import get_settings
-
-settings = get_settings()
+from app.core.config import Settings, get_settings
+from app.core.ids import init_id_generator
+from app.database import dispose_engine, get_shard_ids
+from app.jobs.archiver import ArchiveJob
+from app.jobs.reminders import ReminderScheduler
+from app.services.reminder_service import load_sink
+from app.services.shard_service import ensure_directory_complete
 
 # Configuración de la documentación de la API
 description = """
@@ -15,28 +20,96 @@ To-Do List API permite gestionar tareas y subtareas.
 * **Registro**: Crea una nueva cuenta de usuario
 * **Login**: Obtiene un token de acceso
 * **Me**: Obtiene la información del usuario actual (requiere autenticación)
+
+## Archivo
+
+Las tareas completadas hace más de `ARCHIVE_AFTER_DAYS` días se mueven
+periódicamente al archivo y pueden consultarse en `GET /tasks/archive`.
+
+## Recordatorios
+
+Se emite un recordatorio `REMINDER_LEAD_MINUTES` minutos antes del
+`end_date` de cada tarea pendiente, a través del sink `REMINDER_SINK`.
 """
 
-app = FastAPI(
-    title="To-Do List API",
-    description=description,
-    version="1.0.0",
-    swagger_ui_parameters={"persistAuthorization": True}
-)
-
-# Configuración de CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000"],  # Frontend URL
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Incluir routers
-app.include_router(auth.router)
-app.include_router(tasks.router)
-
-@app.get("/")
-async def root():
-    return {"message": "Bienvenido a la API de To-Do List"} 
\ No newline at end of file
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Crea la aplicación FastAPI.
+
+    No abre conexiones a la base de datos: el engine se crea en el primer uso
+    dentro de cada worker, así la app puede precargarse antes del fork.
+    """
+    settings = settings or get_settings()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Cada worker reserva su nodo de ids al arrancar (falla si no quedan)
+        init_id_generator()
+        if len(get_shard_ids()) > 1:
+            ensure_directory_complete()
+
+        # Archivado periódico de tareas completadas antiguas
+        archive_job = None
+        if settings.ARCHIVE_ENABLED:
+            archive_job = ArchiveJob(
+                older_than_days=settings.ARCHIVE_AFTER_DAYS,
+                batch_size=settings.ARCHIVE_BATCH_SIZE,
+                interval_seconds=settings.ARCHIVE_INTERVAL_SECONDS,
+            )
+            archive_job.start()
+
+        # Recordatorios de vencimiento (un solo worker activo a la vez)
+        reminder_schedulers = []
+        if settings.REMINDERS_ENABLED:
+            sink = load_sink(settings.REMINDER_SINK)
+            for shard_id in get_shard_ids():
+                reminder_scheduler = ReminderScheduler(
+                    sink=sink,
+                    lead_minutes=settings.REMINDER_LEAD_MINUTES,
+                    horizon_minutes=settings.REMINDER_HORIZON_MINUTES,
+                    poll_seconds=settings.REMINDER_POLL_SECONDS,
+                    shard_id=shard_id,
+                )
+                reminder_scheduler.start()
+                reminder_schedulers.append(reminder_scheduler)
+        yield
+        for reminder_scheduler in reminder_schedulers:
+            reminder_scheduler.stop()
+        if archive_job is not None:
+            archive_job.stop()
+        dispose_engine()
+
+    app = FastAPI(
+        title="To-Do List API",
+        description=description,
+        version="1.0.0",
+        lifespan=lifespan,
+        swagger_ui_parameters={"persistAuthorization": True}
+    )
+
+    # Configuración de CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000"],  # Frontend URL
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Incluir routers
+    app.include_router(auth.router)
+    app.include_router(tasks.router)
+
+    @app.get("/")
+    async def root():
+        return {"message": "Bienvenido a la API de To-Do List"}
+
+    return app
+
+if __name__ == "__main__":
+    from app.cli import main
+    main()
+else:
+    # Instancia usada por `uvicorn main:app` y por `python main.py serve`
+    # (que importa `main:app` en lugar de construir la app en `__main__`)
+    app = create_app()
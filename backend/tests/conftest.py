@@ -0,0 +1,67 @@
+import os
+
+# Base de datos SQLite en memoria; debe configurarse antes de importar la app
+os.environ.setdefault("JWT_SECRET_KEY", "test")
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = ":memory:"
+os.environ["SHARD_URLS"] = ""
+# Los jobs en segundo plano no se arrancan en los tests
+os.environ["ARCHIVE_ENABLED"] = "false"
+os.environ["REMINDERS_ENABLED"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_user_db
+from app.core.config import get_settings
+from app.core.security import create_access_token
+from app.database import Base, dispose_engine, get_engine, get_session
+from main import create_app
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(get_engine())
+    session = get_session()
+    try:
+        yield session
+    finally:
+        session.close()
+        dispose_engine()
+
+@pytest.fixture
+def file_db(tmp_path, monkeypatch):
+    """Sesión sobre un SQLite en archivo: escritor único y pool de lectura `query_only`."""
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "app.db"))
+    get_settings.cache_clear()
+    dispose_engine()
+    Base.metadata.create_all(get_engine())
+    session = get_session()
+    yield session
+    session.close()
+    dispose_engine()
+    monkeypatch.undo()
+    get_settings.cache_clear()
+
+@pytest.fixture
+def shards(tmp_path, monkeypatch):
+    """Dos shards SQLite en archivos temporales (el 0 es el catálogo)."""
+    urls = [f"sqlite:///{tmp_path / f'shard{shard_id}.db'}" for shard_id in range(2)]
+    monkeypatch.setenv("SHARD_URLS", ",".join(urls))
+    get_settings.cache_clear()
+    dispose_engine()
+    for shard_id in range(len(urls)):
+        Base.metadata.create_all(get_engine(shard_id))
+    yield list(range(len(urls)))
+    dispose_engine()
+    monkeypatch.undo()
+    get_settings.cache_clear()
+
+@pytest.fixture
+def client(db):
+    """Cliente de la API que usa la misma sesión que el test (la base en memoria tiene una sola conexión)."""
+    app = create_app()
+    app.dependency_overrides[get_user_db] = lambda: db
+    return TestClient(app)
+
+def auth_headers(email: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': email})}"}
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from app.models import ArchivedSubtask, ArchivedTask, Subtask, Task, User
+from app.services.archive_service import archive_completed_tasks
+
+from .conftest import auth_headers
+
+def _user(db):
+    user = User(email="user@example.com", username="user", hashed_password="hash")
+    db.add(user)
+    db.flush()
+    return user
+
+def _task(db, user, title, completed=True, completed_at=None, created_at=None):
+    task = Task(
+        title=title,
+        user_id=user.id,
+        completed=completed,
+        completed_at=completed_at,
+        created_at=created_at or datetime.utcnow(),
+    )
+    db.add(task)
+    db.flush()
+    return task
+
+def test_archive_moves_old_completed_tasks_in_batches(db):
+    user = _user(db)
+    old = datetime.utcnow() - timedelta(days=60)
+    archivable = [_task(db, user, f"old{i}", completed_at=old + timedelta(minutes=i)) for i in range(5)]
+    # Completada antes de existir `completed_at`: se usa `created_at`
+    legacy = _task(db, user, "legacy", completed_at=None, created_at=old)
+    recent = _task(db, user, "recent", completed_at=datetime.utcnow())
+    pending = _task(db, user, "pending", completed=False, created_at=old)
+    db.add_all([
+        Subtask(title="a", task_id=archivable[0].id, position="a", completed=True),
+        Subtask(title="b", task_id=archivable[0].id, position="b"),
+        Subtask(title="kept", task_id=recent.id, position="i"),
+    ])
+    db.commit()
+    archivable_ids = {t.id for t in archivable} | {legacy.id}
+    first_id, pending_id = archivable[0].id, pending.id
+
+    assert archive_completed_tasks(db, older_than_days=30, batch_size=2) == 6
+
+    assert {t.title for t in db.query(Task)} == {"recent", "pending"}
+    assert [s.title for s in db.query(Subtask)] == ["kept"]
+    archived_ids = {t.id for t in db.query(ArchivedTask)}
+    assert archived_ids == archivable_ids
+    archived_subtasks = db.query(ArchivedSubtask).order_by(ArchivedSubtask.position).all()
+    assert [(s.title, s.task_id, s.completed) for s in archived_subtasks] == [
+        ("a", first_id, True),
+        ("b", first_id, False),
+    ]
+    assert db.get(ArchivedTask, pending_id) is None
+
+def test_archive_without_candidates(db):
+    user = _user(db)
+    _task(db, user, "recent", completed_at=datetime.utcnow())
+    db.commit()
+
+    assert archive_completed_tasks(db, older_than_days=30) == 0
+    assert db.query(Task).count() == 1
+
+def test_archive_endpoint_orders_by_completion(db, client):
+    user = _user(db)
+    old = datetime.utcnow() - timedelta(days=60)
+    _task(db, user, "first", completed_at=old)
+    _task(db, user, "second", completed_at=old + timedelta(days=1))
+    # Misma fecha de completado: desempata el id, el más reciente primero
+    _task(db, user, "tied", completed_at=old + timedelta(days=1))
+    _task(db, user, "legacy", completed_at=None, created_at=old)
+    db.commit()
+    email = user.email
+    archive_completed_tasks(db, older_than_days=30)
+
+    response = client.get("/tasks/archive", headers=auth_headers(email))
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()] == ["tied", "second", "first", "legacy"]
+
+    page = client.get("/tasks/archive?skip=1&limit=2", headers=auth_headers(email))
+    assert [t["title"] for t in page.json()] == ["second", "first"]
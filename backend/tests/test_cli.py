@@ -0,0 +1,23 @@
+import pytest
+
+from app.cli import _parse_importtime
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       500 |        500 |   posix
+import time:      1000 |       2000 | site
+import time:       300 |        300 |     pydantic.types
+import time:       200 |        500 |   fastapi
+import time:       100 |        100 |   app.api.auth
+import time:        50 |        650 | main
+"""
+
+def test_parse_importtime_counts_only_main_subtree():
+    total_us, children = _parse_importtime(IMPORTTIME)
+
+    assert total_us == 650
+    assert children == [(500, "fastapi"), (100, "app.api.auth")]
+
+def test_parse_importtime_without_main():
+    with pytest.raises(ValueError):
+        _parse_importtime(IMPORTTIME.replace("| main", "| other"))
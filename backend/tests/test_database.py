@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import get_engine, get_read_engine
+from app.models import User
+
+@pytest.fixture
+def statements(file_db):
+    """Sentencias ejecutadas por cada engine, como ('writer' | 'reader', sql)."""
+    executed = []
+
+    def recorder(name):
+        def record(conn, cursor, statement, *args):
+            executed.append((name, statement))
+        return record
+
+    listeners = [(get_engine(), recorder("writer")), (get_read_engine(), recorder("reader"))]
+    for engine, listener in listeners:
+        event.listen(engine, "before_cursor_execute", listener)
+    yield executed
+    for engine, listener in listeners:
+        event.remove(engine, "before_cursor_execute", listener)
+
+def _engines(statements):
+    """Engine usado por cada sentencia, sin contar los BEGIN."""
+    return [name for name, sql in statements if not sql.startswith("BEGIN")]
+
+def _user(username="user"):
+    return User(email=f"{username}@example.com", username=username, hashed_password="hash")
+
+def test_file_database_has_separate_read_pool(file_db):
+    assert get_read_engine() is not get_engine()
+    with get_engine().connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+
+def test_reads_go_to_read_pool_until_the_session_writes(file_db, statements):
+    file_db.query(User).all()
+
+    assert _engines(statements) == ["reader"]
+
+def test_flushed_rows_are_visible_in_the_same_session(file_db, statements):
+    file_db.add(_user())
+    file_db.flush()
+
+    assert file_db.query(User).filter(User.username == "user").first() is not None
+    assert "reader" not in _engines(statements)
+
+    # Tras el commit las lecturas vuelven al pool de lectura
+    file_db.commit()
+    statements.clear()
+    assert file_db.query(User).count() == 1
+    assert _engines(statements) == ["reader"]
+
+def test_core_writes_are_routed_to_writer(file_db, statements):
+    file_db.execute(insert(User).values(id=1, email="a@example.com", username="a", hashed_password="hash"))
+
+    assert file_db.execute(select(User.id)).scalar() == 1
+    assert _engines(statements) == ["writer", "writer"]
+
+def test_read_pool_rejects_writes(file_db):
+    with get_read_engine().connect() as conn:
+        with pytest.raises(OperationalError, match="readonly"):
+            conn.execute(text("INSERT INTO users (id, email, username, hashed_password) VALUES (1, 'a', 'a', 'h')"))
+
+def test_select_for_update_goes_to_writer(file_db, statements):
+    file_db.query(User).with_for_update().all()
+
+    assert _engines(statements) == ["writer"]
+    file_db.rollback()
+
+def test_writer_takes_write_lock_at_begin(file_db, statements):
+    file_db.add(_user())
+    file_db.commit()
+    file_db.query(User).all()
+
+    begins = [(name, sql) for name, sql in statements if sql.startswith("BEGIN")]
+    assert begins == [("writer", "BEGIN IMMEDIATE"), ("reader", "BEGIN")]
@@ -0,0 +1,57 @@
+import subprocess
+import sys
+import time
+
+from app.core import ids
+from app.core.config import BASE_DIR
+from app.core.ids import IdGenerator, NODE_BITS, SEQUENCE_BITS, MAX_SEQUENCE
+
+class FrozenClock:
+    """Reloj parado en un milisegundo hasta agotar la secuencia."""
+
+    def __init__(self, calls_per_ms: int):
+        self.calls = 0
+        self.calls_per_ms = calls_per_ms
+        self.start = time.time()
+
+    def __call__(self) -> float:
+        self.calls += 1
+        return self.start + (self.calls // self.calls_per_ms) / 1000
+
+def test_ids_are_unique_and_increasing_within_a_millisecond(monkeypatch):
+    monkeypatch.setattr(ids.time, "time", FrozenClock(calls_per_ms=MAX_SEQUENCE * 3))
+    generator = IdGenerator(node_id=7)
+
+    generated = [generator.next_id() for _ in range(MAX_SEQUENCE * 4)]
+
+    assert generated == sorted(generated)
+    assert len(set(generated)) == len(generated)
+    assert all((i >> SEQUENCE_BITS) & ((1 << NODE_BITS) - 1) == 7 for i in generated)
+
+def test_different_nodes_never_collide(monkeypatch):
+    monkeypatch.setattr(ids.time, "time", FrozenClock(calls_per_ms=MAX_SEQUENCE * 3))
+    first, second = IdGenerator(node_id=1), IdGenerator(node_id=2)
+
+    generated = [generator.next_id() for _ in range(MAX_SEQUENCE * 2) for generator in (first, second)]
+
+    assert len(set(generated)) == len(generated)
+
+LEASE_SCRIPT = """
+import sys
+from app.core.ids import _lease_sqlite_node
+print(_lease_sqlite_node(sys.argv[1]), flush=True)
+sys.stdin.read()
+"""
+
+def test_sqlite_leases_get_different_nodes(tmp_path):
+    database = str(tmp_path / "catalog.db")
+    # El lock de archivo es por proceso: el otro nodo se reserva en un subproceso
+    holder = subprocess.Popen(
+        [sys.executable, "-c", LEASE_SCRIPT, database],
+        cwd=BASE_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        held_node = int(holder.stdout.readline())
+        assert ids._lease_sqlite_node(database) != held_node
+    finally:
+        holder.communicate("")
@@ -0,0 +1,30 @@
+import pytest
+
+from app.core.ranks import even_keys, key_between
+
+def test_key_between_respects_bounds():
+    for a, b in [(None, None), (None, "i"), ("i", None), ("a", "b"), ("a", "a1"), ("az", "b"), ("1", "1001")]:
+        key = key_between(a, b)
+        assert a is None or a < key
+        assert b is None or key < b
+        assert not key.endswith("0")
+
+def test_key_between_repeated_inserts_stay_ordered():
+    keys = [key_between(None, None)]
+    for _ in range(50):
+        keys.insert(1, key_between(keys[0], keys[1] if len(keys) > 1 else None))
+        keys.insert(0, key_between(None, keys[0]))
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+
+def test_key_between_rejects_unordered_bounds():
+    with pytest.raises(ValueError):
+        key_between("b", "a")
+    with pytest.raises(ValueError):
+        key_between("i", "i")
+
+def test_even_keys_are_sorted_unique_and_short():
+    keys = even_keys(1000)
+    assert keys == sorted(keys)
+    assert len(set(keys)) == 1000
+    assert max(len(key) for key in keys) <= 3
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Task, User
+from app.schemas.task import TaskCreate, TaskUpdate
+from app.services import reminder_service, task_service
+
+@pytest.fixture
+def published():
+    """Tareas cuyo cambio se notificó al scheduler."""
+    task_ids = []
+    reminder_service.register_local_listener(task_ids.append)
+    yield task_ids
+    reminder_service.unregister_local_listener(task_ids.append)
+
+def _sent_task(db):
+    """Tarea pendiente cuyo recordatorio ya se envió."""
+    user = User(email="user@example.com", username="user", hashed_password="hash")
+    db.add(user)
+    db.commit()
+    end_date = (datetime.utcnow() + timedelta(minutes=10)).replace(microsecond=0)
+    task = task_service.create_task(db, TaskCreate(title="Tarea", end_date=end_date), user.id)
+    assert reminder_service.mark_reminder_sent(db, task.id, end_date)
+    return user.id, task.id, end_date
+
+def test_resending_same_end_date_keeps_reminder_sent(db, published):
+    user_id, task_id, end_date = _sent_task(db)
+    published.clear()
+
+    task_service.update_task(db, task_id, user_id, TaskUpdate(title="Otro título", end_date=end_date, completed=False))
+
+    assert db.get(Task, task_id).reminder_sent_at is not None
+    assert reminder_service.get_task_reminder(db, task_id) is None
+    assert published == []
+
+def test_new_end_date_schedules_a_new_reminder(db, published):
+    user_id, task_id, end_date = _sent_task(db)
+    published.clear()
+
+    task_service.update_task(db, task_id, user_id, TaskUpdate(end_date=end_date + timedelta(days=1)))
+
+    assert db.get(Task, task_id).reminder_sent_at is None
+    assert reminder_service.get_task_reminder(db, task_id) is not None
+    assert published == [task_id]
+
+def test_completed_task_is_not_reminded(db):
+    user_id, task_id, end_date = _sent_task(db)
+    db.query(Task).filter(Task.id == task_id).update({"reminder_sent_at": None})
+    db.commit()
+
+    task_service.update_task(db, task_id, user_id, TaskUpdate(completed=True))
+
+    assert not reminder_service.mark_reminder_sent(db, task_id, end_date)
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import CATALOG_SHARD, get_session
+from app.models import ArchivedSubtask, ArchivedTask, Subtask, Task, User, UserDirectory
+from app.schemas.user import UserCreate
+from app.services import reminder_service, shard_service, user_service
+from main import create_app
+
+from .conftest import auth_headers
+
+@pytest.fixture(autouse=True)
+def fast_hash(monkeypatch):
+    monkeypatch.setattr(user_service, "get_password_hash", lambda password: "hash")
+
+def _register(email="user@example.com", username="user"):
+    catalog = get_session(CATALOG_SHARD)
+    try:
+        user = user_service.create_user(catalog, UserCreate(email=email, username=username, password="password"))
+        return user.id, catalog.get(UserDirectory, user.id).shard_id
+    finally:
+        catalog.close()
+
+def _count(shard, model, **filters):
+    db = get_session(shard)
+    try:
+        return db.query(model).filter_by(**filters).count()
+    finally:
+        db.close()
+
+def test_move_user_copies_all_rows_and_flips_directory(shards):
+    user_id, source = _register()
+    target = 1 - source
+    db = get_session(source)
+    pending = Task(title="pending", user_id=user_id, end_date=datetime.utcnow() + timedelta(minutes=10))
+    done = Task(title="done", user_id=user_id, completed=True, completed_at=datetime.utcnow())
+    archived = ArchivedTask(id=1, title="archived", user_id=user_id, completed_at=datetime.utcnow())
+    db.add_all([pending, done, archived])
+    db.flush()
+    db.add_all([
+        Subtask(title="sub", task_id=pending.id, position="i"),
+        ArchivedSubtask(id=2, title="archived sub", task_id=archived.id, position="i"),
+    ])
+    db.commit()
+    pending_id = pending.id
+    db.close()
+
+    published = []
+    reminder_service.register_local_listener(published.append)
+    try:
+        shard_service.move_user(user_id, target, grace_seconds=0)
+    finally:
+        reminder_service.unregister_local_listener(published.append)
+
+    catalog = get_session(CATALOG_SHARD)
+    entry = catalog.get(UserDirectory, user_id)
+    assert (entry.shard_id, entry.moving) == (target, False)
+    catalog.close()
+    for model, expected in [(User, 1), (Task, 2), (Subtask, 1), (ArchivedTask, 1), (ArchivedSubtask, 1)]:
+        assert _count(target, model) == expected, model
+        assert _count(source, model) == 0, model
+    # El scheduler del destino se entera de la tarea pendiente con fecha
+    assert published == [pending_id]
+
+def test_move_user_to_unknown_shard(shards):
+    user_id, _ = _register()
+
+    with pytest.raises(ValueError):
+        shard_service.move_user(user_id, 5, grace_seconds=0)
+
+def test_backfill_registers_legacy_users(shards):
+    db = get_session(CATALOG_SHARD)
+    db.add(User(id=42, email="legacy@example.com", username="legacy", hashed_password="hash"))
+    db.commit()
+    db.close()
+    with pytest.raises(RuntimeError):
+        shard_service.ensure_directory_complete()
+
+    assert shard_service.backfill_directory() == 1
+    assert shard_service.backfill_directory() == 0
+    shard_service.ensure_directory_complete()
+    assert _count(CATALOG_SHARD, UserDirectory, user_id=42, shard_id=CATALOG_SHARD) == 1
+
+def test_requests_of_moving_user_get_503(shards):
+    user_id, _ = _register()
+    catalog = get_session(CATALOG_SHARD)
+    catalog.get(UserDirectory, user_id).moving = True
+    catalog.commit()
+    catalog.close()
+
+    response = TestClient(create_app()).get("/tasks", headers=auth_headers("user@example.com"))
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+
+def test_requests_are_routed_to_user_shard(shards):
+    user_id, shard_id = _register()
+    db = get_session(shard_id)
+    db.add(Task(title="mine", user_id=user_id))
+    db.commit()
+    db.close()
+
+    response = TestClient(create_app()).get("/tasks", headers=auth_headers("user@example.com"))
+
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()] == ["mine"]
@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+
+from app.database import get_read_engine, get_session
+from app.models import Subtask, Task, User
+from app.schemas.task import SubtaskCreate
+from app.services import task_service
+
+def _legacy_subtasks(db, count):
+    """Subtareas creadas antes de existir las posiciones: todas con la inicial."""
+    user = User(email="user@example.com", username="user", hashed_password="hash")
+    db.add(user)
+    db.flush()
+    task = Task(title="Tarea", user_id=user.id)
+    db.add(task)
+    db.flush()
+    subtasks = [Subtask(title=f"s{i}", task_id=task.id, position="i") for i in range(count)]
+    db.add_all(subtasks)
+    db.commit()
+    return user, task, subtasks
+
+def _titles(db, task_id):
+    return [s.title for s in db.query(Subtask).filter(Subtask.task_id == task_id).order_by(Subtask.position, Subtask.id)]
+
+def test_move_after_with_shared_positions(db):
+    user, task, subtasks = _legacy_subtasks(db, 4)
+
+    task_service.move_subtask(db, subtasks[3].id, task.id, user.id, after_id=subtasks[0].id)
+
+    assert _titles(db, task.id) == ["s0", "s3", "s1", "s2"]
+
+def test_move_before_with_shared_positions(db):
+    user, task, subtasks = _legacy_subtasks(db, 4)
+
+    task_service.move_subtask(db, subtasks[0].id, task.id, user.id, before_id=subtasks[3].id)
+
+    assert _titles(db, task.id) == ["s1", "s2", "s0", "s3"]
+
+def test_move_between_only_rewrites_moved_subtask(db):
+    user, task, subtasks = _legacy_subtasks(db, 3)
+    task_service.rebalance_subtasks(db, task.id)
+    positions = {s.id: s.position for s in db.query(Subtask)}
+
+    task_service.move_subtask(db, subtasks[2].id, task.id, user.id, after_id=subtasks[0].id, before_id=subtasks[1].id)
+
+    assert _titles(db, task.id) == ["s0", "s2", "s1"]
+    changed = [s.id for s in db.query(Subtask) if s.position != positions[s.id]]
+    assert changed == [subtasks[2].id]
+
+def _task_with_subtasks(db, count):
+    user, task, subtasks = _legacy_subtasks(db, count)
+    task_service.rebalance_subtasks(db, task.id)
+    ids = user.id, task.id, [s.id for s in subtasks]
+    # Cerrar la transacción de lectura que abrió el refresco de los atributos
+    db.rollback()
+    return ids
+
+def test_concurrent_appends_get_distinct_positions(file_db):
+    user_id, task_id, _ = _task_with_subtasks(file_db, 1)
+
+    def append(i):
+        db = get_session()
+        try:
+            task_service.create_subtask(db, task_id, user_id, SubtaskCreate(title=f"n{i}"))
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(append, range(40)))
+
+    positions = [p for (p,) in file_db.query(Subtask.position).filter(Subtask.task_id == task_id)]
+    assert len(positions) == 41
+    assert len(set(positions)) == 41
+
+def _reader_statements_before_commit(db, operation):
+    """Sentencias que `operation` envía al pool de lectura antes de confirmar su transacción."""
+    statements = []
+    committed = []
+    record = lambda conn, cursor, statement, *args: committed or statements.append(statement)
+    mark_committed = lambda session: committed.append(True)
+    event.listen(get_read_engine(), "before_cursor_execute", record)
+    event.listen(db, "before_commit", mark_committed)
+    try:
+        operation()
+    finally:
+        event.remove(get_read_engine(), "before_cursor_execute", record)
+        event.remove(db, "before_commit", mark_committed)
+    return statements
+
+def test_position_changes_read_ranks_under_the_task_lock(file_db):
+    user_id, task_id, ids = _task_with_subtasks(file_db, 3)
+
+    # Las posiciones vecinas y la última posición se leen en el escritor,
+    # después de bloquear la tarea
+    assert _reader_statements_before_commit(
+        file_db, lambda: task_service.move_subtask(file_db, ids[2], task_id, user_id, after_id=ids[0])
+    ) == []
+    assert _reader_statements_before_commit(
+        file_db, lambda: task_service.create_subtask(file_db, task_id, user_id, SubtaskCreate(title="nuevo"))
+    ) == []
+    assert _titles(file_db, task_id) == ["s0", "s2", "s1", "nuevo"]
@@ -0,0 +1,49 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+
+from app.database import get_engine
+from app.models import User
+from app.schemas.user import UserCreate
+from app.services import user_service
+
+def _user(email="user@example.com", username="user"):
+    return UserCreate(email=email, username=username, password="password")
+
+@pytest.fixture(autouse=True)
+def fast_hash(monkeypatch):
+    monkeypatch.setattr(user_service, "get_password_hash", lambda password: "hash")
+
+def test_duplicate_email(db):
+    user_service.create_user(db, _user())
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(get_engine(), "before_cursor_execute", record)
+    try:
+        with pytest.raises(HTTPException) as exc:
+            user_service.create_user(db, _user(username="other"))
+    finally:
+        event.remove(get_engine(), "before_cursor_execute", record)
+
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "El email ya está registrado"
+    # Solo el INSERT (y su BEGIN): sin SELECT para averiguar qué chocó
+    assert [sql.split()[0] for sql in statements] == ["BEGIN", "INSERT"]
+
+def test_duplicate_username(db):
+    user_service.create_user(db, _user())
+
+    with pytest.raises(HTTPException) as exc:
+        user_service.create_user(db, _user(email="other@example.com"))
+
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "El nombre de usuario ya está en uso"
+
+def test_primary_key_collision_is_not_reported_as_duplicate(db, monkeypatch):
+    user_service.create_user(db, _user())
+    existing_id = db.execute(select(User.id)).scalar()
+    monkeypatch.setattr(user_service, "generate_id", lambda: existing_id)
+
+    with pytest.raises(IntegrityError):
+        user_service.create_user(db, _user(email="other@example.com", username="other"))